@@ -0,0 +1,287 @@
+"""Run MAX TRON matches between external bots and the built-in AI.
+
+Each bot is a separate program that talks to the server over its stdin and
+stdout with one short text line per message, so bots can be written in any
+language and never run inside the game process:
+
+    server -> bot  START <cols> <rows> <time limit ms>
+    bot -> server  READY
+    server -> bot  TICK <tick> <col> <row> <dir> <opponent col> <opponent row> <opponent dir> [<col>,<row> ...]
+    bot -> server  <tick> U | D | L | R
+    server -> bot  END win | loss | tie
+
+Positions are grid cells, directions are U, D, L or R, and the cells after
+a TICK's heads are the trail cells added since the previous TICK. A reply
+echoes the number of the TICK it answers; lines for other ticks (late
+answers) or without a tick number are read and ignored. A bot that has not
+answered within the time limit gets AggressiveAI's safe move instead
+(straight on if possible, else the first safe turn), and so does every
+move after it exits. Pipes are non-blocking, so a bot that hangs, floods
+or exits can't stall the server.
+
+Matches run in parallel on a process pool, one bot process per match.
+See example_bot.py for a minimal bot.
+
+Usage:
+    python3 bot_server.py "python3 example_bot.py" [--matches 100] [--difficulty hard] [--workers 8]
+"""
+import argparse
+import os
+import random
+import selectors
+import shlex
+import subprocess
+import sys
+import time
+
+import max_tron
+from max_tron import AggressiveAI, Direction, DIFFICULTY_SETTINGS, GRID_SIZE, MCTS_BUDGET_FRACTION, TimingStats
+
+DIRECTION_LETTERS = {Direction.UP: 'U', Direction.DOWN: 'D', Direction.LEFT: 'L', Direction.RIGHT: 'R'}
+LETTER_DIRECTIONS = {letter: direction for direction, letter in DIRECTION_LETTERS.items()}
+STARTUP_LIMIT = 5.0  # Seconds a bot may take to answer START
+READ_SIZE = 4096
+RESULTS = {'player1': ('win', 'loss'), 'player2': ('loss', 'win'), 'tie': ('tie', 'tie')}
+
+
+class BotPlayer:
+    """Drives one cycle from an external bot process
+
+    Has the same get_next_direction(opponent) interface as the AIs, so
+    run_headless_match can play it. A bot that crashes, stops reading or
+    sends garbage is not fatal: every move it fails to make in time is
+    replaced by the fallback.
+    """
+    def __init__(self, command, cycle, time_limit):
+        self.cycle = cycle
+        self.time_limit = time_limit
+        self.fallback = AggressiveAI(cycle)  # Only its safe-move check is used
+        self.latency = TimingStats("Reply time", "moves")
+        self.timeouts = 0
+        self.invalid = 0
+        self.after_exit = 0  # Fallback moves once the bot exited or stopped reading
+        self.responsive = True
+        self.synced = {}  # Trail cells already sent, per cycle
+        self.buffer = b''
+        self.tick = 0
+
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+        os.set_blocking(self.process.stdin.fileno(), False)
+        os.set_blocking(self.process.stdout.fileno(), False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.process.stdout, selectors.EVENT_READ)
+
+        board = cycle.board
+        self.send(f"START {board.cols} {board.rows} {round(time_limit * 1000)}")
+        if self.read_line(time.perf_counter() + STARTUP_LIMIT) != 'READY':
+            self.responsive = False
+
+    def send(self, line):
+        """Write one line without blocking; a bot that doesn't read is dropped"""
+        if not self.responsive:
+            return
+        data = (line + '\n').encode('ascii')
+        try:
+            written = os.write(self.process.stdin.fileno(), data)
+        except (BlockingIOError, BrokenPipeError, OSError):
+            written = 0
+        if written != len(data):
+            self.responsive = False
+
+    def read_line(self, deadline):
+        """Next line from the bot, or None if it doesn't arrive by deadline"""
+        while b'\n' not in self.buffer:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self.responsive:
+                return None
+            if not self.selector.select(remaining):
+                continue
+            try:
+                data = os.read(self.process.stdout.fileno(), READ_SIZE)
+            except BlockingIOError:
+                continue
+            if not data:
+                self.responsive = False  # The bot exited
+                return None
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return line.decode('ascii', 'replace').strip()
+
+    def board_delta(self, opponent):
+        cells = []
+        for cycle in (self.cycle, opponent):
+            start = self.synced.get(id(cycle), 0)
+            cells.extend(f"{tx // GRID_SIZE},{ty // GRID_SIZE}" for tx, ty in cycle.trail[start:])
+            self.synced[id(cycle)] = len(cycle.trail)
+        return cells
+
+    def get_next_direction(self, opponent):
+        cycle = self.cycle
+        tick = str(self.tick)
+        message = ["TICK", tick,
+                   str(cycle.x // GRID_SIZE), str(cycle.y // GRID_SIZE), DIRECTION_LETTERS[cycle.direction],
+                   str(opponent.x // GRID_SIZE), str(opponent.y // GRID_SIZE), DIRECTION_LETTERS[opponent.direction]]
+        self.tick += 1
+        if not self.responsive:
+            self.after_exit += 1
+            return self.fallback.safe_direction(opponent)
+
+        sent = time.perf_counter()
+        self.send(' '.join(message + self.board_delta(opponent)))
+        deadline = sent + self.time_limit
+
+        while True:
+            line = self.read_line(deadline)
+            if line is None:
+                if self.responsive:
+                    self.timeouts += 1
+                else:
+                    self.after_exit += 1
+                return self.fallback.safe_direction(opponent)
+            parts = line.split()
+            if parts and parts[0] == tick:
+                break
+            # An answer to a tick that already timed out, or stray output
+
+        replied = time.perf_counter()
+        if replied > deadline:
+            # Arrived while the server was being scheduled: still too late
+            self.timeouts += 1
+            return self.fallback.safe_direction(opponent)
+
+        self.latency.record(replied - sent)
+        direction = LETTER_DIRECTIONS.get(parts[1].upper()) if len(parts) == 2 else None
+        if direction is None:
+            self.invalid += 1
+            return self.fallback.safe_direction(opponent)
+        return direction
+
+    def finish(self, result):
+        """Tell the bot how the match ended and stop it"""
+        self.send(f"END {result}")
+        self.selector.close()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=0.5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+def play_match(job):
+    """Worker: one bot against AggressiveAI, returning the bot's side of it"""
+    bot_id, command, difficulty, bot_side, width, height, time_limit, seed = job
+    random.seed(seed)
+    bots = []
+
+    def make_bot(cycle):
+        bot = BotPlayer(command, cycle, time_limit)
+        bots.append(bot)
+        return bot
+
+    players = (make_bot, None) if bot_side == 0 else (None, make_bot)
+    result = 'loss'
+    try:
+        winner, ticks = max_tron.run_headless_match(difficulty, width, height, players=players)
+        result = RESULTS[winner][bot_side]
+    finally:
+        for bot in bots:
+            bot.finish(result)
+
+    bot = bots[0]
+    return {
+        'bot': bot_id,
+        'result': result,
+        'ticks': ticks,
+        'latency': (bot.latency.count, bot.latency.total, bot.latency.worst),
+        'timeouts': bot.timeouts,
+        'invalid': bot.invalid,
+        'after_exit': bot.after_exit,
+        'crashed': not bot.responsive,
+    }
+
+
+class BotStats:
+    """Totals for one bot across its matches"""
+    def __init__(self, command):
+        self.command = command
+        self.results = {'win': 0, 'loss': 0, 'tie': 0}
+        self.ticks = 0
+        self.latency = TimingStats("Reply time", "moves")
+        self.timeouts = 0
+        self.invalid = 0
+        self.after_exit = 0
+        self.crashes = 0
+
+    def add(self, match):
+        self.results[match['result']] += 1
+        self.ticks += match['ticks']
+        count, total, worst = match['latency']
+        self.latency.count += count
+        self.latency.total += total
+        self.latency.worst = max(self.latency.worst, worst)
+        self.timeouts += match['timeouts']
+        self.invalid += match['invalid']
+        self.after_exit += match['after_exit']
+        self.crashes += match['crashed']
+
+
+def print_summary(stats, elapsed):
+    matches = sum(sum(bot.results.values()) for bot in stats)
+    ticks = sum(bot.ticks for bot in stats)
+    print(f"\n{matches} matches, {ticks} ticks in {elapsed:.1f}s "
+          f"({matches / elapsed:.1f} matches/s, {ticks / elapsed:.0f} ticks/s)")
+
+    header = (f"{'BOT':<30} {'WIN':>5} {'LOSS':>5} {'TIE':>5} {'AVG MS':>8} {'MAX MS':>8} "
+              f"{'TIMEOUTS':>9} {'INVALID':>8} {'CRASHES':>8} {'AFTER EXIT':>11}")
+    print(header)
+    print('-' * len(header))
+    for bot in stats:
+        latency = bot.latency
+        average_ms = latency.total / latency.count * 1000 if latency.count else 0.0
+        print(f"{bot.command[:30]:<30} {bot.results['win']:>5} {bot.results['loss']:>5} {bot.results['tie']:>5} "
+              f"{average_ms:>8.2f} {latency.worst * 1000:>8.2f} {bot.timeouts:>9} {bot.invalid:>8} {bot.crashes:>8} "
+              f"{bot.after_exit:>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play external MAX TRON bots against the built-in AI")
+    parser.add_argument('bots', nargs='+', help="bot commands, e.g. \"python3 example_bot.py\"")
+    parser.add_argument('--matches', type=int, default=20, help="matches per bot (sides alternate)")
+    parser.add_argument('--difficulty', default='hard', choices=list(DIFFICULTY_SETTINGS))
+    parser.add_argument('--time-limit-ms', type=float,
+                        help="per-move limit (default: the AI's share of a tick at this difficulty)")
+    parser.add_argument('--width', type=int, default=max_tron.DEFAULT_WIDTH)
+    parser.add_argument('--height', type=int, default=max_tron.DEFAULT_HEIGHT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.time_limit_ms is None:
+        time_limit = MCTS_BUDGET_FRACTION / DIFFICULTY_SETTINGS[args.difficulty]['fps']
+    else:
+        time_limit = args.time_limit_ms / 1000
+    print(f"{len(args.bots)} bots x {args.matches} matches against {args.difficulty} AI, "
+          f"{time_limit * 1000:.1f} ms per move, {args.workers} workers")
+
+    jobs = [(bot_id, shlex.split(command), args.difficulty, match % 2, args.width, args.height,
+             time_limit, args.seed + bot_id * args.matches + match)
+            for bot_id, command in enumerate(args.bots) for match in range(args.matches)]
+    stats = [BotStats(command) for command in args.bots]
+    start = time.perf_counter()
+
+    with max_tron.tool_pool(args.workers) as pool:
+        for match in pool.imap_unordered(play_match, jobs):
+            stats[match['bot']].add(match)
+
+    print_summary(stats, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
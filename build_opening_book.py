@@ -0,0 +1,127 @@
+"""Build the MAX TRON opening book.
+
+The cycles always start from the same cells for a given board size, so the
+first few ticks can be searched offline. Starting from the start state, the
+AI's reply to every opening is found with a long MCTSAI search, then every
+non-reversing player reply is expanded, level by level, up to --depth ticks.
+Positions of a level are searched in parallel across a process pool.
+
+Usage:
+    python3 build_opening_book.py [--depth 6] [--think 0.05] [--sizes 1280x1024 1920x1080]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import max_tron
+from max_tron import (CYAN, ORANGE, DIRECTION_INDEX, DIRECTION_ORDER, FORWARD_MOVES,
+                      LightCycle, MCTSAI, OpeningBook, TrailBoard, opening_key, start_positions)
+
+# The windowed size plus common desktop resolutions used in fullscreen
+DEFAULT_SIZES = ['1280x1024', '1366x768', '1440x900', '1536x864', '1680x1050',
+                 '1920x1080', '1920x1200', '2560x1440']
+MAX_DEPTH = 15  # Opening keys must fit in 64 bits (4 bits per tick)
+
+
+def replay(width, height, history):
+    """Rebuild an opening by replaying (player1, player2) direction indexes"""
+    max_tron.BOARD_WIDTH = width
+    max_tron.BOARD_HEIGHT = height
+
+    board = TrailBoard(width, height)
+    (x1, y1), (x2, y2) = start_positions(width, height)
+    player = LightCycle(x1, y1, CYAN, max_tron.Direction.RIGHT, verbose=False, board=board)
+    computer = LightCycle(x2, y2, ORANGE, max_tron.Direction.LEFT, verbose=False, board=board)
+
+    key = 1
+    for player_move, computer_move in history:
+        player.change_direction(DIRECTION_ORDER[player_move])
+        computer.change_direction(DIRECTION_ORDER[computer_move])
+        player.move()
+        computer.move()
+        player.check_collision(computer)
+        computer.check_collision(player)
+        key = opening_key(key, player, computer)
+    return player, computer, key
+
+
+def init_worker():
+    # Each book worker searches in-process; the pool is already the parallelism
+    max_tron.MCTS_WORKERS = 0
+
+
+def best_reply(job):
+    """Worker: search one opening and return (history, key, computer move)"""
+    width, height, history, think, seed = job
+    random.seed(seed)
+    player, computer, key = replay(width, height, history)
+    ai = MCTSAI(computer, fps=1, budget=think)
+    direction = ai.get_next_direction(player)
+    return history, key, DIRECTION_INDEX[direction]
+
+
+def build_section(pool, width, height, depth, think, seed):
+    """Search every opening up to depth ticks for one board size"""
+    entries = {}
+    level = [()]
+    for tick in range(depth):
+        jobs = [(width, height, history, think, seed + i) for i, history in enumerate(level)]
+        seed += len(jobs)
+        next_level = []
+        for history, key, computer_move in pool.imap_unordered(best_reply, jobs, chunksize=4):
+            entries[key] = computer_move
+            if tick + 1 == depth:
+                continue
+
+            # Expand every non-reversing player reply to the book move
+            player, computer, _ = replay(width, height, history)
+            player_dir = DIRECTION_INDEX[player.direction]
+            for player_move in FORWARD_MOVES[player_dir]:
+                child = history + ((player_move, computer_move),)
+                player, computer, _ = replay(width, height, child)
+                if player.alive and computer.alive:
+                    next_level.append(child)
+        print(f"  {width}x{height} tick {tick}: {len(level)} positions")
+        level = next_level
+    return entries
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the MAX TRON opening book")
+    parser.add_argument('--depth', type=int, default=6, help="ticks covered by the book")
+    parser.add_argument('--think', type=float, default=0.05, help="search seconds per position")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="board sizes, e.g. 1920x1080")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=max_tron.OPENING_BOOK_PATH)
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.depth <= MAX_DEPTH:
+        print(f"--depth must be between 1 and {MAX_DEPTH}")
+        return 1
+
+    # Add to an existing book so sizes can be built separately
+    book = OpeningBook.load(args.out) or OpeningBook()
+
+    with max_tron.tool_pool(args.workers, initializer=init_worker) as pool:
+        for size in args.sizes:
+            width, height = parse_size(size)
+            start = time.perf_counter()
+            entries = build_section(pool, width, height, args.depth, args.think, args.seed)
+            book.sections[(width, height)] = (args.depth, entries)
+            print(f"{width}x{height}: {len(entries)} positions in {time.perf_counter() - start:.1f}s")
+
+    book.save(args.out)
+    print(f"Wrote {args.out} ({os.path.getsize(args.out)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""Calibrate the MAX TRON difficulty tiers with headless self-play.
+
+Builds candidate AI profiles from a grid of lookahead depths, base
+aggression levels and aggression-factor presets (plus the current
+DIFFICULTY_SETTINGS tiers) and plays them against each other on all cores.
+Every pairing starts from a few random safe opening moves, since the mirrored
+start positions otherwise end most games in head-on ties, and each opening
+is played twice with the sides swapped. Elo ratings are fitted to the
+results and one profile is chosen per tier, all five together, so that each
+tier beats the one below it at about the target win rate while its 95th
+percentile decision time stays inside the tier's tick budget.
+
+Usage:
+    python3 calibrate.py [--rounds 20] [--target-win-rate 0.7] [--workers 8]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+import max_tron
+from max_tron import AGGRESSION_FACTORS, DEFAULT_OPENING_MOVES, DIFFICULTY_SETTINGS, random_opening
+
+FACTOR_PRESETS = {
+    'default': AGGRESSION_FACTORS,
+    'cautious': {'trapped': 0.2, 'two_exits': 0.5, 'close': 0.5, 'far': 1.1,
+                 'player_trapped': 1.3, 'player_two_exits': 1.1},
+    'bold': {'trapped': 0.5, 'two_exits': 0.8, 'close': 0.9, 'far': 1.4,
+             'player_trapped': 1.8, 'player_two_exits': 1.4},
+}
+DEFAULT_LOOKAHEADS = [5, 8, 12, 15, 20, 25, 35, 50]
+DEFAULT_AGGRESSIONS = [0.3, 0.5, 0.7, 0.85, 0.95, 0.99]
+ELO_ANCHOR = 1000  # Rating given to the current 'easy' tier
+BUCKET_MS = 0.05  # Decision time histogram resolution
+
+
+def build_candidates(lookaheads, aggressions, presets):
+    candidates = [dict(settings, name=f'current-{tier}', factors=AGGRESSION_FACTORS)
+                  for tier, settings in DIFFICULTY_SETTINGS.items()]
+    for lookahead in lookaheads:
+        for aggression in aggressions:
+            for preset in presets:
+                candidates.append({
+                    'name': f'L{lookahead}-A{aggression}-{preset}',
+                    'ai_lookahead': lookahead,
+                    'aggression': aggression,
+                    'factors': FACTOR_PRESETS[preset],
+                })
+    return candidates
+
+
+class DecisionTimes:
+    """Decision time histogram (BUCKET_MS wide buckets) for percentiles"""
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def record(self, duration):
+        bucket = int(duration * 1000.0 / BUCKET_MS)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += duration
+        self.worst = max(self.worst, duration)
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.worst = max(self.worst, other.worst)
+
+    def average_ms(self):
+        return 1000.0 * self.total / self.count if self.count else 0.0
+
+    def percentile_ms(self, fraction):
+        """Upper edge of the bucket holding the given fraction of decisions"""
+        needed = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= needed:
+                return (bucket + 1) * BUCKET_MS
+        return 0.0
+
+
+def play_game(job):
+    """Worker: one headless match between two candidates"""
+    first, second, profiles, width, height, opening, seed = job
+    random.seed(seed)
+    timing = (DecisionTimes(), DecisionTimes())
+    winner, ticks = max_tron.run_headless_match(None, width, height, profiles=profiles, timing=timing,
+                                                opening=opening)
+    score = {'player1': 1.0, 'player2': 0.0, 'tie': 0.5}[winner]
+    return first, second, score, ticks, timing
+
+
+def schedule(candidates, rounds, width, height, opening_moves, seed):
+    """Random pairings: every candidate plays one opening per round, once from each side"""
+    rng = random.Random(seed)
+    order = list(range(len(candidates)))
+    for _ in range(rounds):
+        rng.shuffle(order)
+        for i in range(0, len(order) - 1, 2):
+            first, second = order[i], order[i + 1]
+            opening = random_opening(width, height, opening_moves, rng)
+            game_seed = rng.randrange(1 << 30)
+            yield first, second, opening, game_seed
+            yield second, first, opening, game_seed
+
+
+def fit_elo(count, results, iterations=500):
+    """Bradley-Terry ratings (ties count half) by minorise-maximise updates
+
+    results maps (i, j) with i < j to [games, score of i]. Every candidate
+    also gets one virtual draw against a rating-1 reference so that
+    unbeaten or winless candidates keep finite ratings.
+    """
+    strength = [1.0] * count
+    wins = [0.5] * count
+    for (i, j), (games, score) in results.items():
+        wins[i] += score
+        wins[j] += games - score
+
+    for _ in range(iterations):
+        updated = []
+        for i in range(count):
+            denominator = 1.0 / (strength[i] + 1.0)
+            for (a, b), (games, _) in results.items():
+                if a == i:
+                    denominator += games / (strength[i] + strength[b])
+                elif b == i:
+                    denominator += games / (strength[i] + strength[a])
+            updated.append(wins[i] / denominator)
+        strength = updated
+
+    return [400.0 * math.log10(value) for value in strength]
+
+
+def elo_errors(ratings, results):
+    """Approximate standard error of each rating from the fit's curvature
+
+    Uses the diagonal of the Bradley-Terry information matrix, including the
+    virtual draw against the reference, so it ignores the uncertainty of
+    the opponents' ratings.
+    """
+    strength = [10.0 ** (rating / 400.0) for rating in ratings]
+    information = [value / (value + 1.0) ** 2 for value in strength]
+    for (i, j), (games, _) in results.items():
+        p = strength[i] / (strength[i] + strength[j])
+        information[i] += games * p * (1.0 - p)
+        information[j] += games * p * (1.0 - p)
+    return [400.0 / math.log(10.0) / math.sqrt(value) for value in information]
+
+
+def propose_tiers(ratings, decision_ms, base_rating, target_gap, budget_fraction):
+    """Choose one candidate per tier, all tiers together
+
+    Ratings must rise strictly from tier to tier and each candidate's
+    decision_ms (a high percentile) must fit its tier's budget. Among those
+    ladders, dynamic programming over candidates finds the one closest (in
+    squared Elo error) to starting at base_rating and climbing target_gap
+    per tier. Returns [(tier, candidate, target Elo, budget ms)], or None
+    if no ladder fits.
+    """
+    tiers = [(tier, budget_fraction * 1000.0 / settings['fps'])
+             for tier, settings in DIFFICULTY_SETTINGS.items()]
+    order = sorted(range(len(ratings)), key=lambda i: ratings[i])
+
+    # best[t][i] = (cost of the cheapest ladder up to tier t ending at i, candidate for tier t - 1)
+    best = [{i: ((ratings[i] - base_rating) ** 2, None) for i in order if decision_ms[i] <= tiers[0][1]}]
+    for _, budget_ms in tiers[1:]:
+        previous = best[-1]
+        layer = {}
+        for i in order:
+            if decision_ms[i] > budget_ms:
+                continue
+            options = [(cost + (ratings[i] - ratings[j] - target_gap) ** 2, j)
+                       for j, (cost, _) in previous.items() if ratings[j] < ratings[i]]
+            if options:
+                layer[i] = min(options)
+        best.append(layer)
+
+    if not best[-1]:
+        return None
+    choices = [min(best[-1], key=lambda i: best[-1][i][0])]
+    for layer in reversed(best[1:]):
+        choices.append(layer[choices[-1]][1])
+    choices.reverse()
+
+    targets = [base_rating] + [ratings[choice] + target_gap for choice in choices[:-1]]
+    return [(tier, choice, target, budget_ms)
+            for (tier, budget_ms), choice, target in zip(tiers, choices, targets)]
+
+
+def factors_name(factors):
+    for name, preset in FACTOR_PRESETS.items():
+        if preset == factors:
+            return name
+    return 'custom'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate MAX TRON difficulty tiers")
+    parser.add_argument('--rounds', type=int, default=20,
+                        help="openings per candidate, each played once from both sides")
+    parser.add_argument('--opening-moves', type=int, default=DEFAULT_OPENING_MOVES,
+                        help="random safe moves played by both cycles before the AIs take over")
+    parser.add_argument('--lookaheads', type=int, nargs='+', default=DEFAULT_LOOKAHEADS)
+    parser.add_argument('--aggressions', type=float, nargs='+', default=DEFAULT_AGGRESSIONS)
+    parser.add_argument('--presets', nargs='+', default=list(FACTOR_PRESETS), choices=list(FACTOR_PRESETS))
+    parser.add_argument('--target-win-rate', type=float, default=0.7,
+                        help="expected score of each tier against the tier below")
+    parser.add_argument('--budget-fraction', type=float, default=0.5,
+                        help="share of a tick (1 / fps) the 95th percentile AI decision may take")
+    parser.add_argument('--width', type=int, default=max_tron.DEFAULT_WIDTH)
+    parser.add_argument('--height', type=int, default=max_tron.DEFAULT_HEIGHT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if not 0.5 < args.target_win_rate < 1.0:
+        print("--target-win-rate must be between 0.5 and 1.0")
+        return 1
+
+    candidates = build_candidates(args.lookaheads, args.aggressions, args.presets)
+    profiles = [{key: c[key] for key in ('ai_lookahead', 'aggression', 'factors')} for c in candidates]
+    jobs = [(first, second, (profiles[first], profiles[second]), args.width, args.height, opening, seed)
+            for first, second, opening, seed in schedule(candidates, args.rounds, args.width, args.height,
+                                                         args.opening_moves, args.seed)]
+    print(f"{len(candidates)} candidates, {len(jobs)} games on {args.workers} workers")
+
+    results = {}  # (i, j) with i < j -> [games, score of i]
+    games = [0] * len(candidates)
+    draws = [0] * len(candidates)
+    timing = [DecisionTimes() for _ in candidates]
+    start = time.perf_counter()
+
+    with max_tron.tool_pool(args.workers) as pool:
+        for done, (first, second, score, _, sides) in enumerate(
+                pool.imap_unordered(play_game, jobs, chunksize=4), 1):
+            i, j = (first, second) if first < second else (second, first)
+            pair = results.setdefault((i, j), [0, 0.0])
+            pair[0] += 1
+            pair[1] += score if i == first else 1.0 - score
+
+            for index, times in zip((first, second), sides):
+                games[index] += 1
+                draws[index] += score == 0.5
+                timing[index].merge(times)
+
+            if done % 500 == 0:
+                print(f"  {done}/{len(jobs)} games ({time.perf_counter() - start:.0f}s)")
+
+    ratings = fit_elo(len(candidates), results)
+    errors = elo_errors(ratings, results)
+    anchor = ratings[[c['name'] for c in candidates].index('current-easy')]
+    ratings = [rating - anchor + ELO_ANCHOR for rating in ratings]
+    p95_ms = [times.percentile_ms(0.95) for times in timing]
+    print(f"Draw rate: {sum(draws) / max(sum(games), 1):.1%}")
+
+    print(f"\n{'CANDIDATE':<28} {'ELO':>7} {'+/-':>5} {'GAMES':>6} {'DRAWS':>6} "
+          f"{'AVG MS':>8} {'P95 MS':>8} {'MAX MS':>8}")
+    for i in sorted(range(len(candidates)), key=lambda i: ratings[i], reverse=True):
+        draw_rate = draws[i] / games[i] if games[i] else 0.0
+        print(f"{candidates[i]['name']:<28} {ratings[i]:>7.0f} {errors[i]:>5.0f} {games[i]:>6} {draw_rate:>6.0%} "
+              f"{timing[i].average_ms():>8.3f} {p95_ms[i]:>8.3f} {timing[i].worst * 1000:>8.3f}")
+
+    target_gap = 400.0 * math.log10(args.target_win_rate / (1.0 - args.target_win_rate))
+    # Keep the easiest tier where it is today
+    proposal = propose_tiers(ratings, p95_ms, ELO_ANCHOR, target_gap, args.budget_fraction)
+    if proposal is None:
+        print("\nNo set of candidates gets stronger at every tier within the decision time budgets; "
+              "try more candidates or a larger --budget-fraction")
+        return 1
+
+    print(f"\nProposed tiers (target gap {target_gap:.0f} Elo = {args.target_win_rate:.0%} expected score):")
+    for tier, choice, target, budget_ms in proposal:
+        candidate = candidates[choice]
+        print(f"  {tier:<7} {candidate['name']:<28} Elo {ratings[choice]:.0f} +/- {errors[choice]:.0f} "
+              f"(target {target:.0f}), p95 {p95_ms[choice]:.2f} ms of {budget_ms:.1f} ms budget, "
+              f"factors: {factors_name(candidate['factors'])}")
+    for (lower, below, _, _), (upper, above, _, _) in zip(proposal, proposal[1:]):
+        if ratings[above] - ratings[below] < math.hypot(errors[above], errors[below]):
+            print(f"  note: {upper} is not clearly stronger than {lower} yet; more --rounds would tell")
+
+    print("\nDIFFICULTY_SETTINGS = {")
+    for tier, choice, _, _ in proposal:
+        settings = candidates[choice]
+        line = (f"    '{tier}': {{'fps': {DIFFICULTY_SETTINGS[tier]['fps']}, "
+                f"'ai_lookahead': {settings['ai_lookahead']}, 'aggression': {settings['aggression']}")
+        if settings['factors'] != AGGRESSION_FACTORS:
+            line += f", 'factors': {settings['factors']}"
+        print(line + "},")
+    print("}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
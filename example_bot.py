@@ -0,0 +1,56 @@
+"""Minimal MAX TRON bot for bot_server.py.
+
+Keeps its own copy of the board from the cells sent with every TICK and
+steers towards the longest straight run of free cells. Standard library
+only, so it doubles as a reference for the protocol described in
+bot_server.py.
+
+Usage:
+    python3 bot_server.py "python3 example_bot.py"
+"""
+import sys
+
+MOVES = {'U': (0, -1), 'D': (0, 1), 'L': (-1, 0), 'R': (1, 0)}
+REVERSE = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+
+
+def free_run(taken, cols, rows, col, row, move):
+    dx, dy = MOVES[move]
+    length = 0
+    col, row = col + dx, row + dy
+    while 0 <= col < cols and 0 <= row < rows and (col, row) not in taken:
+        length += 1
+        col, row = col + dx, row + dy
+    return length
+
+
+def main():
+    cols = rows = 0
+    taken = set()
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+
+        if parts[0] == 'START':
+            cols, rows = int(parts[1]), int(parts[2])
+            taken = set()
+            print('READY', flush=True)
+        elif parts[0] == 'TICK':
+            col, row, direction = int(parts[2]), int(parts[3]), parts[4]
+            opponent = (int(parts[5]), int(parts[6]))
+            for cell in parts[8:]:
+                x, y = cell.split(',')
+                taken.add((int(x), int(y)))
+
+            # Never aim straight at the opponent's head
+            blocked = taken | {opponent}
+            options = [move for move in MOVES if move != REVERSE[direction]]
+            best = max(options, key=lambda move: (free_run(blocked, cols, rows, col, row, move), move == direction))
+            print(parts[1], best, flush=True)
+        elif parts[0] == 'END':
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Summarise the MAX TRON match log.
+
+Reads the JSON-lines file written by the game (match_log.jsonl) in chunks,
+so millions of matches can be summarised in constant memory.
+
+Usage:
+    python3 match_stats.py [match_log.jsonl ...]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+
+CHUNK_BYTES = 1 << 20  # Read roughly 1 MB of lines at a time
+TICK_BUCKET = 10  # Histogram bucket width used for the median estimate
+
+DEFAULT_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'match_log.jsonl')
+DIFFICULTY_ORDER = ['easy', 'medium', 'hard', 'insane', 'hacker']
+
+
+class GroupStats:
+    """Streaming statistics for one (difficulty, mode) group"""
+    def __init__(self):
+        self.matches = 0
+        self.wins = {'player1': 0, 'player2': 0, 'tie': 0}
+        # Welford running mean/variance of match length
+        self.ticks_mean = 0.0
+        self.ticks_m2 = 0.0
+        self.ticks_min = None
+        self.ticks_max = 0
+        self.tick_histogram = {}
+        self.trail_total = 0
+        self.ai_decisions = 0
+        self.ai_total_ms = 0.0
+        self.ai_max_ms = 0.0
+
+    def add(self, record):
+        self.matches += 1
+        winner = record.get('winner')
+        if winner in self.wins:
+            self.wins[winner] += 1
+
+        ticks = record.get('ticks', 0)
+        delta = ticks - self.ticks_mean
+        self.ticks_mean += delta / self.matches
+        self.ticks_m2 += delta * (ticks - self.ticks_mean)
+        self.ticks_min = ticks if self.ticks_min is None else min(self.ticks_min, ticks)
+        self.ticks_max = max(self.ticks_max, ticks)
+        bucket = ticks // TICK_BUCKET
+        self.tick_histogram[bucket] = self.tick_histogram.get(bucket, 0) + 1
+
+        self.trail_total += sum(record.get('trails', ()))
+
+        ai = record.get('ai')
+        if ai and ai.get('n'):
+            self.ai_decisions += ai['n']
+            self.ai_total_ms += ai['avg_ms'] * ai['n']
+            self.ai_max_ms = max(self.ai_max_ms, ai['max_ms'])
+
+    def median_ticks(self):
+        """Approximate median from the tick histogram (bucket midpoint)"""
+        halfway = self.matches / 2
+        seen = 0
+        for bucket in sorted(self.tick_histogram):
+            seen += self.tick_histogram[bucket]
+            if seen >= halfway:
+                return bucket * TICK_BUCKET + TICK_BUCKET // 2
+        return 0
+
+    def ticks_stdev(self):
+        if self.matches < 2:
+            return 0.0
+        return math.sqrt(self.ticks_m2 / (self.matches - 1))
+
+
+def read_records(path):
+    """Yield match records from a log file, reading it in chunks"""
+    with open(path, 'r', encoding='utf-8') as log_file:
+        while True:
+            lines = log_file.readlines(CHUNK_BYTES)
+            if not lines:
+                break
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A kiosk may have been switched off mid-write
+                    continue
+
+
+def summarise(paths):
+    groups = {}
+    for path in paths:
+        for record in read_records(path):
+            key = (record.get('difficulty'), record.get('mode'))
+            if key not in groups:
+                groups[key] = GroupStats()
+            groups[key].add(record)
+    return groups
+
+
+def sort_key(key):
+    difficulty, mode = key
+    rank = DIFFICULTY_ORDER.index(difficulty) if difficulty in DIFFICULTY_ORDER else len(DIFFICULTY_ORDER)
+    return (rank, str(difficulty), str(mode))
+
+
+def print_summary(groups):
+    if not groups:
+        print("No matches recorded")
+        return
+
+    header = (f"{'DIFFICULTY':<10} {'MODE':<11} {'MATCHES':>8} {'P1 WIN%':>8} {'P2 WIN%':>8} "
+              f"{'TIE%':>6} {'TICKS AVG':>10} {'SD':>7} {'MEDIAN':>7} {'MIN':>6} {'MAX':>6} "
+              f"{'AI AVG MS':>10} {'AI MAX MS':>10}")
+    print(header)
+    print('-' * len(header))
+
+    for key in sorted(groups, key=sort_key):
+        stats = groups[key]
+        difficulty, mode = key
+        percent = {name: 100.0 * count / stats.matches for name, count in stats.wins.items()}
+        ai_avg = stats.ai_total_ms / stats.ai_decisions if stats.ai_decisions else 0.0
+        print(f"{str(difficulty):<10} {str(mode):<11} {stats.matches:>8} "
+              f"{percent['player1']:>8.1f} {percent['player2']:>8.1f} {percent['tie']:>6.1f} "
+              f"{stats.ticks_mean:>10.1f} {stats.ticks_stdev():>7.1f} {stats.median_ticks():>7} "
+              f"{stats.ticks_min:>6} {stats.ticks_max:>6} {ai_avg:>10.3f} {stats.ai_max_ms:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise MAX TRON match logs")
+    parser.add_argument('logs', nargs='*', default=[DEFAULT_LOG],
+                        help="match log files (default: match_log.jsonl next to the game)")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.logs if not os.path.exists(path)]
+    if missing:
+        print(f"Match log not found: {', '.join(missing)}")
+        return 1
+
+    print_summary(summarise(args.logs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
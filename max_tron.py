@@ -3,17 +3,42 @@ import sys
 from enum import Enum
 import random
 import os
-
-# Initialize Pygame
-pygame.init()
+import time
+import json
+import queue
+import threading
+import math
+import multiprocessing
+import signal
+import struct
+from contextlib import contextmanager
+from collections import deque, OrderedDict
 
 # Constants
 DEFAULT_WIDTH = 1280
 DEFAULT_HEIGHT = 1024
 WINDOW_WIDTH = DEFAULT_WIDTH
 WINDOW_HEIGHT = DEFAULT_HEIGHT
+# Playing field size; equals the window size except in arena mode
+BOARD_WIDTH = DEFAULT_WIDTH
+BOARD_HEIGHT = DEFAULT_HEIGHT
 GRID_SIZE = 10
+ARENA_SCALE = 4  # Arena mode board is this many windows wide and high
+CHUNK_SIZE = 500  # Arena trail chunk size in pixels (a multiple of the grid lines)
+REWIND_SECONDS = 3  # How far back [B] on the game over screen jumps
+TRAIL_LIFETIME = 150  # Ticks a trail cell lasts in timed-trail mode
+IDLE_WAIT_MS = 1000  # Menus and game over sleep until input, waking at least this often
 FULLSCREEN = False  # Set to True for fullscreen mode
+TURN_QUEUE_SIZE = 3  # Max buffered turns per player (one is applied each tick)
+MATCH_LOG_ENABLED = True  # Append every finished match to the match log
+AI_TYPE = 'aggressive'  # Computer opponent: 'aggressive' or 'mcts'
+MCTS_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Rollout processes (0 = search in-process)
+MCTS_BUDGET_FRACTION = 0.5  # Share of each tick (1 / fps) the MCTS AI may think for
+OPENING_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+MATCH_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'match_log.jsonl')
+
+# Events that make an idle screen (menus, game over) redraw
+REDRAW_EVENTS = {pygame.KEYDOWN, pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED}
 
 # Difficulty settings
 DIFFICULTY_SETTINGS = {
@@ -24,6 +49,16 @@ DIFFICULTY_SETTINGS = {
     'hacker': {'fps': 60, 'ai_lookahead': 50, 'aggression': 0.99}
 }
 
+# Multipliers AggressiveAI applies to its base aggression as the game unfolds
+AGGRESSION_FACTORS = {
+    'trapped': 0.3,           # At most one exit left: very defensive
+    'two_exits': 0.6,         # Two exits: moderately defensive
+    'close': 0.7,             # Very close to the player: avoid a collision
+    'far': 1.2,               # Far away: close the gap
+    'player_trapped': 1.5,    # Player has at most one exit: go for the kill
+    'player_two_exits': 1.2,  # Player has two exits
+}
+
 # Colors (bright and colorful!)
 BLACK = (0, 0, 0)
 CYAN = (0, 255, 255)
@@ -35,6 +70,66 @@ DARK_BLUE = (0, 20, 40)
 NEON_BLUE = (0, 150, 255)
 NEON_PINK = (255, 20, 147)
 
+def board_shape(width, height):
+    """(rows, cols) of the cell grid that cycle positions can occupy"""
+    # Positions are multiples of GRID_SIZE, so a partial last row/column still
+    # holds a cell: round up
+    return (-(-height // GRID_SIZE), -(-width // GRID_SIZE))
+
+def start_positions(width, height):
+    """Grid-aligned start cells: (100, H/2) and (W-100, H/2) snapped to the grid"""
+    y = (height // 2) // GRID_SIZE * GRID_SIZE
+    return (100, y), ((width - 100) // GRID_SIZE * GRID_SIZE, y)
+
+# The AIs mostly crash into each other head-on from the mirrored start, so
+# the offline tools start their matches from a random opening instead
+DEFAULT_OPENING_MOVES = 20
+
+def random_opening(width, height, moves, rng):
+    """Up to moves random (dir1, dir2) pairs from the start positions that
+    never reverse or hit a wall or trail, for run_headless_match's opening"""
+    heads = list(start_positions(width, height))
+    facing = [Direction.RIGHT, Direction.LEFT]
+    taken = set(heads)
+    opening = []
+    for _ in range(moves):
+        for side in (0, 1):
+            x, y = heads[side]
+            dx, dy = facing[side].value
+            options = []
+            for direction in Direction:
+                new_dx, new_dy = direction.value
+                cell = (x + new_dx * GRID_SIZE, y + new_dy * GRID_SIZE)
+                if (new_dx + dx or new_dy + dy) and cell not in taken and \
+                        0 <= cell[0] < width and 0 <= cell[1] < height:
+                    options.append((direction, cell))
+            if not options:
+                return opening
+            facing[side], heads[side] = rng.choice(options)
+            taken.add(heads[side])
+        opening.append(tuple(facing))
+    return opening
+
+def draw_trail_cell(surface, tx, ty, color):
+    """Draw one trail cell as a multi-layered neon tube segment"""
+    # Outer glow (darkest)
+    outer_rect = pygame.Rect(tx - 1, ty - 1, GRID_SIZE + 2, GRID_SIZE + 2)
+    dark_color = tuple(c // 3 for c in color)
+    pygame.draw.rect(surface, dark_color, outer_rect, border_radius=2)
+
+    # Middle layer (medium glow)
+    mid_color = tuple(c * 2 // 3 for c in color)
+    mid_rect = pygame.Rect(tx, ty, GRID_SIZE, GRID_SIZE)
+    pygame.draw.rect(surface, mid_color, mid_rect, border_radius=1)
+
+    # Inner bright neon
+    inner_rect = pygame.Rect(tx + 1, ty + 1, GRID_SIZE - 2, GRID_SIZE - 2)
+    pygame.draw.rect(surface, color, inner_rect)
+
+    # White hot center (neon tube core)
+    center_rect = pygame.Rect(tx + 3, ty + 3, GRID_SIZE - 6, GRID_SIZE - 6)
+    pygame.draw.rect(surface, WHITE, center_rect)
+
 # Directions
 class Direction(Enum):
     UP = (0, -1)
@@ -91,21 +186,185 @@ def load_bike_sprites():
     else:
         print("ℹ Using built-in drawn bikes")
 
+class TrailBoard:
+    """Trail occupancy grid with per-cell distances to the nearest obstacle
+
+    For every cell, open[direction][cell] is how many free cells lie ahead
+    in that direction before a trail or the wall. Adding a trail cell only
+    rewrites the cells of its row and column that could see it, so a
+    straight-line space query is a single lookup.
+
+    With timed trails, expires[cell] is the move number at which the trail
+    cell there disappears, so queries can look past cells that will be gone
+    by the time a cycle reaches them.
+    """
+    def __init__(self, width, height, timed=False):
+        self.rows, self.cols = board_shape(width, height)
+        rows, cols = self.rows, self.cols
+        self.occupied = bytearray(rows * cols)
+        self.expires = [0] * (rows * cols) if timed else None
+        self.open = {
+            Direction.UP: [r for r in range(rows) for c in range(cols)],
+            Direction.DOWN: [rows - 1 - r for r in range(rows) for c in range(cols)],
+            Direction.LEFT: [c for r in range(rows) for c in range(cols)],
+            Direction.RIGHT: [cols - 1 - c for r in range(rows) for c in range(cols)],
+        }
+
+    def index(self, x, y):
+        """Flat cell index for a pixel position, or None if off the board"""
+        col = x // GRID_SIZE
+        row = y // GRID_SIZE
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return None
+
+    def is_free(self, x, y):
+        cell = self.index(x, y)
+        return cell is not None and not self.occupied[cell]
+
+    def blocked(self, cell, when=None):
+        """True if cell still holds a trail at move number when"""
+        if not self.occupied[cell]:
+            return False
+        return self.expires is None or when is None or self.expires[cell] > when
+
+    def open_distance(self, x, y, direction, when=None, limit=None):
+        """Free cells ahead of (x, y) in direction (None if off the board)
+
+        With timed trails and a move number when (the cycle is at (x, y) by
+        then), trail cells that will have expired by the time the cycle gets
+        to them don't end the run; the count stops at limit.
+        """
+        cell = self.index(x, y)
+        if cell is None:
+            return None
+        ahead = self.open[direction]
+        distance = ahead[cell]
+        if self.expires is None or when is None:
+            return distance
+
+        dx, dy = direction.value
+        row, col = divmod(cell, self.cols)
+        step = dy * self.cols + dx
+        while limit is None or distance < limit:
+            reach = distance + 1
+            if not (0 <= col + dx * reach < self.cols and 0 <= row + dy * reach < self.rows):
+                break
+            # The run ends at a trail cell: jump past it if it will be gone
+            blocker = cell + step * reach
+            if self.expires[blocker] > when + reach:
+                break
+            distance = reach + ahead[blocker]
+        return distance if limit is None else min(distance, limit)
+
+    def add_obstacle(self, x, y, expires=None):
+        cell = self.index(x, y)
+        if cell is None or self.occupied[cell]:
+            return
+        self.occupied[cell] = 1
+        if self.expires is not None and expires is not None:
+            self.expires[cell] = expires
+
+        occupied = self.occupied
+        cols = self.cols
+        row, col = divmod(cell, cols)
+        row_start = row * cols
+
+        # Each scan stops at the first obstacle; that obstacle's own ray
+        # also ends here now, so it is updated too
+        right = self.open[Direction.RIGHT]
+        k = col - 1
+        while k >= 0:
+            right[row_start + k] = col - k - 1
+            if occupied[row_start + k]:
+                break
+            k -= 1
+
+        left = self.open[Direction.LEFT]
+        k = col + 1
+        while k < cols:
+            left[row_start + k] = k - col - 1
+            if occupied[row_start + k]:
+                break
+            k += 1
+
+        down = self.open[Direction.DOWN]
+        k = row - 1
+        while k >= 0:
+            down[k * cols + col] = row - k - 1
+            if occupied[k * cols + col]:
+                break
+            k -= 1
+
+        up = self.open[Direction.UP]
+        k = row + 1
+        while k < self.rows:
+            up[k * cols + col] = k - row - 1
+            if occupied[k * cols + col]:
+                break
+            k += 1
+
+    def remove_obstacle(self, x, y):
+        """Free a trail cell again (timed trails, restoring a snapshot)"""
+        cell = self.index(x, y)
+        if cell is None or not self.occupied[cell]:
+            return
+        self.occupied[cell] = 0
+        if self.expires is not None:
+            self.expires[cell] = 0
+
+        cols = self.cols
+        row, col = divmod(cell, cols)
+        self.rescan(row * cols, 1, cols, col, Direction.LEFT, Direction.RIGHT)
+        self.rescan(col, cols, self.rows, row, Direction.UP, Direction.DOWN)
+
+    def rescan(self, first, stride, length, position, backward, forward):
+        """Recompute the free run through position in one row or column
+
+        The line is cells first + i * stride for i in range(length); backward
+        is the direction of decreasing i. The obstacles bounding the run get
+        their rays into it updated too.
+        """
+        occupied = self.occupied
+        low = position - 1
+        while low >= 0 and not occupied[first + low * stride]:
+            low -= 1
+        high = position + 1
+        while high < length and not occupied[first + high * stride]:
+            high += 1
+
+        back = self.open[backward]
+        ahead = self.open[forward]
+        for i in range(low + 1, high):
+            back[first + i * stride] = i - low - 1
+            ahead[first + i * stride] = high - i - 1
+        if low >= 0:
+            ahead[first + low * stride] = high - low - 1
+        if high < length:
+            back[first + high * stride] = high - low - 1
+
 class LightCycle:
-    def __init__(self, x, y, color, direction, sprite=None):
+    def __init__(self, x, y, color, direction, sprite=None, verbose=True, board=None, trail_lifetime=None):
         self.x = x
         self.y = y
         self.color = color
         self.direction = direction
-        self.trail = []
+        # Timed trails live in a fixed-size ring buffer: once it is full, the
+        # oldest cell expires as each new one is laid
+        self.trail_lifetime = trail_lifetime
+        self.trail = deque(maxlen=trail_lifetime) if trail_lifetime else []
+        self.moves = 0
         self.alive = True
         self.sprite = sprite
+        self.turn_queue = deque()  # Buffered (direction, timestamp) turns
+        self.board = board  # Shared TrailBoard, if any
 
         # Debug: Show what we're using
-        if self.sprite:
-            print(f"  LightCycle created with CUSTOM SPRITE (color: {color})")
-        else:
-            print(f"  LightCycle created with DRAWN BIKE (color: {color})")
+        if verbose:
+            if self.sprite:
+                print(f"  LightCycle created with CUSTOM SPRITE (color: {color})")
+            else:
+                print(f"  LightCycle created with DRAWN BIKE (color: {color})")
 
         # Cache rotated sprites for each direction
         if self.sprite:
@@ -115,14 +374,24 @@ class LightCycle:
                 Direction.UP: pygame.transform.rotate(self.sprite, 90),
                 Direction.DOWN: pygame.transform.rotate(self.sprite, -90)
             }
-            print(f"  Rotated sprites cached for all 4 directions")
+            if verbose:
+                print(f"  Rotated sprites cached for all 4 directions")
 
     def move(self):
         if not self.alive:
             return
 
+        self.moves += 1
+        if self.trail_lifetime and len(self.trail) == self.trail_lifetime:
+            tx, ty = self.trail.popleft()
+            if self.board:
+                self.board.remove_obstacle(tx, ty)
+
         # Add current position to trail
         self.trail.append((self.x, self.y))
+        if self.board:
+            expires = self.moves + self.trail_lifetime if self.trail_lifetime else None
+            self.board.add_obstacle(self.x, self.y, expires)
 
         # Move in current direction
         dx, dy = self.direction.value
@@ -137,23 +406,88 @@ class LightCycle:
         if dx + new_dx != 0 or dy + new_dy != 0:
             self.direction = new_direction
 
+    def snapshot(self):
+        """State capture: O(1) for permanent trails, which are only ever
+        appended to so their length is enough; timed trails are copied"""
+        trail = tuple(self.trail) if self.trail_lifetime else len(self.trail)
+        return (self.x, self.y, self.direction, self.alive, self.moves, trail)
+
+    def restore(self, state):
+        """Return to a snapshot, undoing only the trail cells added since
+
+        A timed trail may have lost cells since, so it is swapped for the
+        saved copy; call mark_trail() once every cycle on the board has been
+        restored, as an expired cell may have been reused by another cycle.
+        """
+        self.x, self.y, self.direction, self.alive, self.moves, trail = state
+        if self.trail_lifetime:
+            if self.board:
+                for tx, ty in self.trail:
+                    self.board.remove_obstacle(tx, ty)
+            self.trail = deque(trail, maxlen=self.trail_lifetime)
+        else:
+            if self.board:
+                for tx, ty in reversed(self.trail[trail:]):
+                    self.board.remove_obstacle(tx, ty)
+            del self.trail[trail:]
+        # Buffered key presses belong to the abandoned future
+        self.turn_queue.clear()
+
+    def mark_trail(self):
+        """Put a restored timed trail back on the board with its expiry times"""
+        if not (self.board and self.trail_lifetime):
+            return
+        first_expiry = self.moves - len(self.trail) + 1 + self.trail_lifetime
+        for i, (tx, ty) in enumerate(self.trail):
+            self.board.add_obstacle(tx, ty, first_expiry + i)
+
+    def queue_direction(self, new_direction, timestamp=None):
+        """Buffer a turn so several key presses within one tick are not lost"""
+        if len(self.turn_queue) >= TURN_QUEUE_SIZE:
+            return False
+
+        # Validate against the last buffered turn, not the current direction,
+        # so a quick UP then LEFT makes a tight U-turn instead of being dropped
+        last_direction = self.turn_queue[-1][0] if self.turn_queue else self.direction
+        dx, dy = last_direction.value
+        new_dx, new_dy = new_direction.value
+        if new_direction == last_direction or (dx + new_dx == 0 and dy + new_dy == 0):
+            return False
+
+        self.turn_queue.append((new_direction, timestamp))
+        return True
+
+    def apply_queued_turn(self):
+        """Apply the oldest buffered turn (one per tick), returning its timestamp"""
+        if not self.turn_queue:
+            return None
+
+        new_direction, timestamp = self.turn_queue.popleft()
+        self.change_direction(new_direction)
+        return timestamp
+
     def check_collision(self, other_cycle=None):
         # Check wall collision
-        if (self.x < 0 or self.x >= WINDOW_WIDTH or
-            self.y < 0 or self.y >= WINDOW_HEIGHT):
+        if (self.x < 0 or self.x >= BOARD_WIDTH or
+            self.y < 0 or self.y >= BOARD_HEIGHT):
             self.alive = False
             return True
 
-        # Check self collision
-        if (self.x, self.y) in self.trail[:-1]:
-            self.alive = False
-            return True
+        # Check trail collision: one lookup when the cycles share a board
+        if self.board:
+            if not self.board.is_free(self.x, self.y):
+                self.alive = False
+                return True
+        else:
+            if (self.x, self.y) in self.trail[:-1]:
+                self.alive = False
+                return True
+            if other_cycle and (self.x, self.y) in other_cycle.trail:
+                self.alive = False
+                return True
 
         # Check collision with other cycle
         if other_cycle:
-            if (self.x, self.y) in other_cycle.trail:
-                self.alive = False
-                return True
             if self.x == other_cycle.x and self.y == other_cycle.y:
                 self.alive = False
                 other_cycle.alive = False
@@ -230,79 +564,163 @@ class LightCycle:
             # Headlight
             pygame.draw.circle(screen, WHITE, (x + 5, y + 9), 1)
 
-    def draw(self, screen):
+    def draw(self, screen, camera=(0, 0)):
         # Draw trail with neon tube glow effect (multi-layered)
+        cam_x, cam_y = camera
+        # Timed trails dim for the last quarter of their lifetime
+        fading = len(self.trail) - self.trail_lifetime * 3 // 4 if self.trail_lifetime else 0
+        faded_color = tuple(c // 2 for c in self.color)
         for i, (tx, ty) in enumerate(self.trail):
-            # Outer glow (darkest)
-            outer_rect = pygame.Rect(tx - 1, ty - 1, GRID_SIZE + 2, GRID_SIZE + 2)
-            dark_color = tuple(c // 3 for c in self.color)
-            pygame.draw.rect(screen, dark_color, outer_rect, border_radius=2)
-
-            # Middle layer (medium glow)
-            mid_color = tuple(c * 2 // 3 for c in self.color)
-            mid_rect = pygame.Rect(tx, ty, GRID_SIZE, GRID_SIZE)
-            pygame.draw.rect(screen, mid_color, mid_rect, border_radius=1)
+            draw_trail_cell(screen, tx - cam_x, ty - cam_y, faded_color if i < fading else self.color)
 
-            # Inner bright neon
-            inner_rect = pygame.Rect(tx + 1, ty + 1, GRID_SIZE - 2, GRID_SIZE - 2)
-            pygame.draw.rect(screen, self.color, inner_rect)
+        self.draw_head(screen, camera)
 
-            # White hot center (neon tube core)
-            center_rect = pygame.Rect(tx + 3, ty + 3, GRID_SIZE - 6, GRID_SIZE - 6)
-            pygame.draw.rect(screen, WHITE, center_rect)
-
-        # Draw cycle head
-        if self.alive:
-            if self.sprite:
-                # Use sprite image
-                current_sprite = self.rotated_sprites[self.direction]
-                sprite_rect = current_sprite.get_rect()
-
-                # Draw glow behind sprite
-                glow_size = max(sprite_rect.width, sprite_rect.height) + 10
-                glow_rect = pygame.Rect(
-                    self.x - (glow_size - GRID_SIZE) // 2,
-                    self.y - (glow_size - GRID_SIZE) // 2,
-                    glow_size, glow_size
-                )
-                dark_color = tuple(c // 3 for c in self.color)
-                pygame.draw.rect(screen, dark_color, glow_rect, border_radius=5)
-
-                # Position sprite centered on grid position
-                sprite_rect.center = (self.x + GRID_SIZE // 2, self.y + GRID_SIZE // 2)
-                screen.blit(current_sprite, sprite_rect)
-            else:
-                # Fallback to drawn bike
-                # Large outer glow
-                glow_rect = pygame.Rect(self.x - 3, self.y - 3, GRID_SIZE + 6, GRID_SIZE + 6)
-                dark_color = tuple(c // 4 for c in self.color)
-                pygame.draw.rect(screen, dark_color, glow_rect, border_radius=3)
+    def draw_head(self, screen, camera=(0, 0)):
+        """Draw the cycle itself at its position relative to the camera"""
+        if not self.alive:
+            return
 
-                # Medium glow
-                mid_glow = pygame.Rect(self.x - 1, self.y - 1, GRID_SIZE + 2, GRID_SIZE + 2)
-                mid_color = tuple(c * 2 // 3 for c in self.color)
-                pygame.draw.rect(screen, mid_color, mid_glow, border_radius=2)
+        x = self.x - camera[0]
+        y = self.y - camera[1]
 
-                # Bright neon background
-                head_rect = pygame.Rect(self.x, self.y, GRID_SIZE, GRID_SIZE)
-                pygame.draw.rect(screen, self.color, head_rect, border_radius=1)
+        if self.sprite:
+            # Use sprite image
+            current_sprite = self.rotated_sprites[self.direction]
+            sprite_rect = current_sprite.get_rect()
+
+            # Draw glow behind sprite
+            glow_size = max(sprite_rect.width, sprite_rect.height) + 10
+            glow_rect = pygame.Rect(
+                x - (glow_size - GRID_SIZE) // 2,
+                y - (glow_size - GRID_SIZE) // 2,
+                glow_size, glow_size
+            )
+            dark_color = tuple(c // 3 for c in self.color)
+            pygame.draw.rect(screen, dark_color, glow_rect, border_radius=5)
 
-                # Draw the bike on top
-                self.draw_bike(screen, self.x, self.y, self.direction)
+            # Position sprite centered on grid position
+            sprite_rect.center = (x + GRID_SIZE // 2, y + GRID_SIZE // 2)
+            screen.blit(current_sprite, sprite_rect)
+        else:
+            # Fallback to drawn bike
+            # Large outer glow
+            glow_rect = pygame.Rect(x - 3, y - 3, GRID_SIZE + 6, GRID_SIZE + 6)
+            dark_color = tuple(c // 4 for c in self.color)
+            pygame.draw.rect(screen, dark_color, glow_rect, border_radius=3)
+
+            # Medium glow
+            mid_glow = pygame.Rect(x - 1, y - 1, GRID_SIZE + 2, GRID_SIZE + 2)
+            mid_color = tuple(c * 2 // 3 for c in self.color)
+            pygame.draw.rect(screen, mid_color, mid_glow, border_radius=2)
+
+            # Bright neon background
+            head_rect = pygame.Rect(x, y, GRID_SIZE, GRID_SIZE)
+            pygame.draw.rect(screen, self.color, head_rect, border_radius=1)
+
+            # Draw the bike on top
+            self.draw_bike(screen, x, y, self.direction)
+
+class TrailChunkCache:
+    """Arena trail rendering in fixed-size chunk surfaces
+
+    Each chunk is an opaque CHUNK_SIZE square of background, grid and trail.
+    Chunks are only rendered when they come into view (from the trail cells
+    recorded for them) and the least recently shown ones are dropped once
+    there are more than about twice a screenful, so surface memory and frame
+    time depend on the viewport, not the arena size.
+    """
+    def __init__(self, board_width, board_height):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.capacity = 0  # Set from the screen size on every draw
+        self.surfaces = OrderedDict()  # (chunk col, chunk row) -> Surface, oldest first
+        self.cells = {}  # (chunk col, chunk row) -> [(x, y, color), ...]
+        self.synced = {}  # Trail cells already recorded, per cycle
+        self.created = 0
+        self.evicted = 0
+
+    def sync(self, cycles):
+        """Record new trail cells, drawing them into chunks that are cached"""
+        for cycle in cycles:
+            start = self.synced.get(id(cycle), 0)
+            for tx, ty in cycle.trail[start:]:
+                key = (tx // CHUNK_SIZE, ty // CHUNK_SIZE)
+                self.cells.setdefault(key, []).append((tx, ty, cycle.color))
+                surface = self.surfaces.get(key)
+                if surface is not None:
+                    draw_trail_cell(surface, tx - key[0] * CHUNK_SIZE, ty - key[1] * CHUNK_SIZE, cycle.color)
+            self.synced[id(cycle)] = len(cycle.trail)
+
+    def render_chunk(self, key):
+        origin_x = key[0] * CHUNK_SIZE
+        origin_y = key[1] * CHUNK_SIZE
+        width = min(CHUNK_SIZE, self.board_width - origin_x)
+        height = min(CHUNK_SIZE, self.board_height - origin_y)
+
+        surface = pygame.Surface((width, height))
+        surface.fill(DARK_BLUE)
+        # CHUNK_SIZE is a multiple of the grid line spacing, so lines line up
+        for x in range(0, width, GRID_SIZE * 5):
+            pygame.draw.line(surface, WHITE, (x, 0), (x, height), 1)
+        for y in range(0, height, GRID_SIZE * 5):
+            pygame.draw.line(surface, WHITE, (0, y), (width, y), 1)
+
+        for tx, ty, color in self.cells.get(key, ()):
+            draw_trail_cell(surface, tx - origin_x, ty - origin_y, color)
+        return surface
+
+    def chunk_surface(self, key):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.render_chunk(key)
+        self.surfaces[key] = surface
+        self.created += 1
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+            self.evicted += 1
+        return surface
+
+    def draw(self, screen, camera):
+        """Blit only the chunks that overlap the viewport"""
+        cam_x, cam_y = camera
+        view_width, view_height = screen.get_size()
+        self.capacity = 2 * (view_width // CHUNK_SIZE + 2) * (view_height // CHUNK_SIZE + 2)
+        last_col = min(cam_x + view_width, self.board_width) - 1
+        last_row = min(cam_y + view_height, self.board_height) - 1
+
+        for chunk_row in range(max(0, cam_y) // CHUNK_SIZE, last_row // CHUNK_SIZE + 1):
+            for chunk_col in range(max(0, cam_x) // CHUNK_SIZE, last_col // CHUNK_SIZE + 1):
+                surface = self.chunk_surface((chunk_col, chunk_row))
+                screen.blit(surface, (chunk_col * CHUNK_SIZE - cam_x, chunk_row * CHUNK_SIZE - cam_y))
 
 class AggressiveAI:
     """Strategic AI that adapts tactics based on game state"""
-    def __init__(self, cycle, lookahead_depth=5, aggression=0.5):
+    def __init__(self, cycle, lookahead_depth=5, aggression=0.5, factors=None):
         self.cycle = cycle
         self.lookahead_depth = lookahead_depth
         self.base_aggression = aggression  # Base aggression level
         self.aggression = aggression  # Current aggression (dynamically adjusted)
+        self.factors = factors or AGGRESSION_FACTORS
+
+    def count_open_space(self, start_x, start_y, direction, player_cycle, depth=None, steps=0):
+        """Count available space in a direction
 
-    def count_open_space(self, start_x, start_y, direction, player_cycle, depth=None):
-        """Count available space in a direction"""
+        steps is how many moves it takes to get to (start_x, start_y); timed
+        trail cells that are gone by the time they are reached count as free.
+        """
         if depth is None:
             depth = self.lookahead_depth
 
+        # Single lookup when both cycles share a TrailBoard
+        board = self.cycle.board
+        if board is not None and board is player_cycle.board:
+            distance = board.open_distance(start_x, start_y, direction, self.cycle.moves + steps, depth)
+            if distance is not None:
+                return min(depth, distance)
+
         dx, dy = direction.value
         count = 0
 
@@ -310,18 +728,47 @@ class AggressiveAI:
             test_x = start_x + (dx * GRID_SIZE * i)
             test_y = start_y + (dy * GRID_SIZE * i)
 
-            if (test_x < 0 or test_x >= WINDOW_WIDTH or
-                test_y < 0 or test_y >= WINDOW_HEIGHT):
+            if (test_x < 0 or test_x >= BOARD_WIDTH or
+                test_y < 0 or test_y >= BOARD_HEIGHT):
                 break
 
-            if ((test_x, test_y) in self.cycle.trail or
-                (test_x, test_y) in player_cycle.trail):
+            if self.is_trail(test_x, test_y, player_cycle, steps + i):
                 break
 
             count += 1
 
         return count
 
+    def is_trail(self, x, y, player_cycle, steps=0):
+        """True if (x, y) is on either cycle's trail, steps moves from now"""
+        board = self.cycle.board
+        if board is not None and board is player_cycle.board:
+            cell = board.index(x, y)
+            if cell is not None:
+                return board.blocked(cell, self.cycle.moves + steps)
+        return (x, y) in self.cycle.trail or (x, y) in player_cycle.trail
+
+    def is_safe_move(self, direction, player_cycle):
+        """True if direction doesn't reverse and its next cell is on the board and free"""
+        dx, dy = self.cycle.direction.value
+        new_dx, new_dy = direction.value
+        if dx + new_dx == 0 and dy + new_dy == 0:
+            return False
+
+        test_x = self.cycle.x + new_dx * GRID_SIZE
+        test_y = self.cycle.y + new_dy * GRID_SIZE
+        if test_x < 0 or test_x >= BOARD_WIDTH or test_y < 0 or test_y >= BOARD_HEIGHT:
+            return False
+        return not self.is_trail(test_x, test_y, player_cycle, steps=1)
+
+    def safe_direction(self, player_cycle):
+        """Fallback move without any search: straight on if safe, else the first safe turn"""
+        current_dir = self.cycle.direction
+        for direction in [current_dir, Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]:
+            if self.is_safe_move(direction, player_cycle):
+                return direction
+        return current_dir
+
     def calculate_distance_to_player(self, pos_x, pos_y, player_cycle):
         """Calculate Manhattan distance to player"""
         return abs(pos_x - player_cycle.x) + abs(pos_y - player_cycle.y)
@@ -357,13 +804,12 @@ class AggressiveAI:
             test_x = player_cycle.x + dx * GRID_SIZE
             test_y = player_cycle.y + dy * GRID_SIZE
 
-            if (test_x >= 0 and test_x < WINDOW_WIDTH and
-                test_y >= 0 and test_y < WINDOW_HEIGHT and
-                (test_x, test_y) not in player_cycle.trail and
-                (test_x, test_y) not in self.cycle.trail):
+            if (test_x >= 0 and test_x < BOARD_WIDTH and
+                test_y >= 0 and test_y < BOARD_HEIGHT and
+                not self.is_trail(test_x, test_y, player_cycle, steps=1)):
 
                 # Count space in this direction
-                space = self.count_open_space(test_x, test_y, direction, player_cycle, depth=5)
+                space = self.count_open_space(test_x, test_y, direction, player_cycle, depth=5, steps=1)
                 if space > 2:
                     escape_count += 1
 
@@ -385,8 +831,8 @@ class AggressiveAI:
             test_x = self.cycle.x + dx * GRID_SIZE
             test_y = self.cycle.y + dy * GRID_SIZE
 
-            if (test_x >= 0 and test_x < WINDOW_WIDTH and
-                test_y >= 0 and test_y < WINDOW_HEIGHT and
+            if (test_x >= 0 and test_x < BOARD_WIDTH and
+                test_y >= 0 and test_y < BOARD_HEIGHT and
                 (test_x, test_y) not in self.cycle.trail):
 
                 escape_count += 1
@@ -401,23 +847,23 @@ class AggressiveAI:
         # Factor 1: Own survival - if we have few exits, be more defensive
         own_exits = self.count_own_escape_routes()
         if own_exits <= 1:
-            dynamic_aggression *= 0.3  # Very defensive if trapped
+            dynamic_aggression *= self.factors['trapped']  # Very defensive if trapped
         elif own_exits == 2:
-            dynamic_aggression *= 0.6  # Moderately defensive
+            dynamic_aggression *= self.factors['two_exits']  # Moderately defensive
 
         # Factor 2: Distance to player - be more cautious when close
         dist = self.calculate_distance_to_player(self.cycle.x, self.cycle.y, player_cycle)
         if dist < 50:  # Very close
-            dynamic_aggression *= 0.7  # More defensive to avoid collision
+            dynamic_aggression *= self.factors['close']  # More defensive to avoid collision
         elif dist > 300:  # Far away
-            dynamic_aggression = min(1.0, dynamic_aggression * 1.2)  # More aggressive
+            dynamic_aggression = min(1.0, dynamic_aggression * self.factors['far'])  # More aggressive
 
         # Factor 3: Player's situation - if player is trapped, be more aggressive
         player_exits = self.count_player_escape_routes(player_cycle)
         if player_exits <= 1:
-            dynamic_aggression = min(1.0, dynamic_aggression * 1.5)  # Go for the kill!
+            dynamic_aggression = min(1.0, dynamic_aggression * self.factors['player_trapped'])  # Go for the kill!
         elif player_exits == 2:
-            dynamic_aggression = min(1.0, dynamic_aggression * 1.2)
+            dynamic_aggression = min(1.0, dynamic_aggression * self.factors['player_two_exits'])
 
         # Factor 4: Add randomness to be less predictable (±15%)
         random_factor = 1.0 + (random.random() * 0.3 - 0.15)
@@ -457,7 +903,7 @@ class AggressiveAI:
             score += 60 * self.aggression  # Almost trapped!
 
         # Bonus for positioning between player and center/open space
-        center_x, center_y = WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2
+        center_x, center_y = BOARD_WIDTH // 2, BOARD_HEIGHT // 2
         if abs(future_x - center_x) < abs(player_cycle.x - center_x):
             score += 8 * self.aggression
 
@@ -483,20 +929,8 @@ class AggressiveAI:
         safe_dirs = []
 
         for direction in possible_dirs:
-            # Don't reverse
-            dx, dy = current_dir.value
-            new_dx, new_dy = direction.value
-            if dx + new_dx == 0 and dy + new_dy == 0:
-                continue
-
-            # Check immediate safety
-            test_x = self.cycle.x + new_dx * GRID_SIZE
-            test_y = self.cycle.y + new_dy * GRID_SIZE
-
-            if test_x < 0 or test_x >= WINDOW_WIDTH or test_y < 0 or test_y >= WINDOW_HEIGHT:
-                continue
-
-            if (test_x, test_y) in self.cycle.trail or (test_x, test_y) in player_cycle.trail:
+            # Don't reverse, and check immediate safety
+            if not self.is_safe_move(direction, player_cycle):
                 continue
 
             # Evaluate this direction
@@ -562,10 +996,580 @@ class AggressiveAI:
             safe_dirs.sort(key=lambda x: (x[2] * 0.8 + x[3] * 0.2), reverse=True)
             return safe_dirs[0][0]
 
+# Compact board used by search: a bytearray with one byte per cell (1 = taken),
+# heads as (col, row) cells and directions as indexes into DIRECTION_ORDER
+DIRECTION_ORDER = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTION_ORDER)}
+DIRECTION_STEPS = [direction.value for direction in DIRECTION_ORDER]
+# Non-reversing moves for each direction, straight ahead first
+FORWARD_MOVES = [[0, 2, 3], [1, 2, 3], [2, 0, 1], [3, 0, 1]]
+
+MCTS_EXPLORATION = 0.7  # UCB1 exploration constant (rewards are 0..1)
+MCTS_ROLLOUTS_PER_TASK = 8  # Rollouts each pool task plays from one leaf
+MCTS_ROLLOUT_LIMIT = 150  # Rollouts longer than this count as a tie
+MCTS_ROLLOUT_STRAIGHT = 0.7  # Chance a rollout keeps going straight when safe
+
+def compact_step(board, cols, rows, heads, moves):
+    """Move both heads one cell at once, marking the board; returns (heads, alive)"""
+    new_heads = []
+    alive = []
+    for (col, row), move in zip(heads, moves):
+        dc, dr = DIRECTION_STEPS[move]
+        col += dc
+        row += dr
+        new_heads.append((col, row))
+        alive.append(0 <= col < cols and 0 <= row < rows and not board[row * cols + col])
+
+    # Head-on collision kills both, like LightCycle.check_collision
+    if new_heads[0] == new_heads[1]:
+        alive = [False, False]
+
+    for (col, row), is_alive in zip(new_heads, alive):
+        if is_alive:
+            board[row * cols + col] = 1
+    return new_heads, alive
+
+def compact_reward(alive):
+    """Reward for player 0 once someone has crashed (tie = 0.5)"""
+    if alive[0] == alive[1]:
+        return 0.5
+    return 1.0 if alive[0] else 0.0
+
+def rollout_move(board, cols, rows, head, direction, rng):
+    """Cheap rollout policy: mostly straight, otherwise any move that survives"""
+    col, row = head
+    options = []
+    for move in FORWARD_MOVES[direction]:
+        dc, dr = DIRECTION_STEPS[move]
+        c, r = col + dc, row + dr
+        if 0 <= c < cols and 0 <= r < rows and not board[r * cols + c]:
+            options.append(move)
+
+    if not options:
+        return direction
+    if options[0] == direction and rng.random() < MCTS_ROLLOUT_STRAIGHT:
+        return direction
+    return rng.choice(options)
+
+def mcts_rollouts(board, cols, rows, heads, directions, count, seed):
+    """Play count random rollouts from a compact state; returns player 0's total reward
+
+    Module-level so it can run in the MCTS process pool.
+    """
+    rng = random.Random(seed)
+    total = 0.0
+    for _ in range(count):
+        scratch = bytearray(board)
+        rollout_heads = heads
+        rollout_dirs = list(directions)
+        reward = 0.5
+        for _ in range(MCTS_ROLLOUT_LIMIT):
+            rollout_dirs = [rollout_move(scratch, cols, rows, rollout_heads[i], rollout_dirs[i], rng)
+                            for i in range(2)]
+            rollout_heads, alive = compact_step(scratch, cols, rows, rollout_heads, rollout_dirs)
+            if not all(alive):
+                reward = compact_reward(alive)
+                break
+        total += reward
+    return total
+
+_mcts_pool = None
+
+def get_mcts_pool():
+    """Lazily start the shared rollout pool (None when MCTS_WORKERS is 0)"""
+    global _mcts_pool
+    if _mcts_pool is None and MCTS_WORKERS > 0:
+        # Spawn so workers don't inherit the display from the game process
+        _mcts_pool = multiprocessing.get_context('spawn').Pool(MCTS_WORKERS)
+    return _mcts_pool
+
+def shutdown_mcts_pool():
+    global _mcts_pool
+    if _mcts_pool is not None:
+        _mcts_pool.close()
+        _mcts_pool.join()
+        _mcts_pool = None
+
+def init_tool_worker(initializer):
+    # Ctrl-C reaches the whole process group: leave it to the parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer:
+        initializer()
+
+@contextmanager
+def tool_pool(processes, initializer=None):
+    """Process pool for the offline tools that Ctrl-C can stop
+
+    Finished runs close and join the pool as usual; an interrupt or error
+    terminates it instead of waiting for every queued job.
+    """
+    pool = multiprocessing.Pool(processes, initializer=init_tool_worker, initargs=(initializer,))
+    try:
+        yield pool
+    except BaseException:
+        pool.terminate()
+        pool.join()
+        raise
+    pool.close()
+    pool.join()
+
+class MCTSNode:
+    """Joint-move tree node with decoupled per-player action statistics"""
+    __slots__ = ('heads', 'directions', 'terminal', 'reward', 'actions',
+                 'visits', 'stats', 'children')
+
+    def __init__(self, heads, directions, alive=(True, True)):
+        self.heads = heads
+        self.directions = directions
+        self.terminal = not all(alive)
+        self.reward = compact_reward(alive) if self.terminal else None
+        self.actions = [FORWARD_MOVES[d] for d in directions]
+        self.visits = 0
+        # stats[player][move] = [visits, total reward for that player]
+        self.stats = [{move: [0, 0.0] for move in moves} for moves in self.actions]
+        self.children = {}
+
+    def select(self, player):
+        """UCB1 over this player's own statistics (decoupled UCT)"""
+        best_move = None
+        best_score = -1.0
+        log_visits = math.log(max(1, self.visits))
+        for move, (visits, total) in self.stats[player].items():
+            if visits == 0:
+                return move
+            score = total / visits + MCTS_EXPLORATION * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best_move, best_score = move, score
+        return best_move
+
+class MCTSAI:
+    """Monte Carlo tree search opponent for simultaneous moves
+
+    The tree lives in the game process; rollouts from its leaves are farmed
+    out to a process pool. Each decision stops at a fixed share of the tick
+    (1 / fps), and the subtree under the move actually played is kept for
+    the next tick.
+    """
+    def __init__(self, cycle, fps, budget=None):
+        self.cycle = cycle
+        # Seconds per decision; offline tools may pass a fixed budget instead
+        self.budget = budget if budget is not None else MCTS_BUDGET_FRACTION / fps
+        self.rows, self.cols = board_shape(BOARD_WIDTH, BOARD_HEIGHT)
+        self.board = bytearray(self.rows * self.cols)
+        self.synced = {}  # Trail cells already marked on the board, per cycle
+        self.root = None
+        self.last_move = None
+        self.seed = random.randrange(1 << 30)
+        self.iterations = 0
+        self.reused_roots = 0
+
+        # Start the pool now so the first tick isn't spent spawning workers
+        get_mcts_pool()
+
+    def cell(self, x, y):
+        return (x // GRID_SIZE, y // GRID_SIZE)
+
+    def sync_board(self, player_cycle):
+        """Mark trail cells added since the last tick plus both heads"""
+        if self.cycle.trail_lifetime and self.cycle.board is not None:
+            # Timed trails also lose cells, so copy the shared board instead
+            self.board[:] = self.cycle.board.occupied
+
+        for cycle in (self.cycle, player_cycle):
+            if not cycle.trail_lifetime:
+                start = self.synced.get(id(cycle), 0)
+                for tx, ty in cycle.trail[start:]:
+                    col, row = self.cell(tx, ty)
+                    self.board[row * self.cols + col] = 1
+                self.synced[id(cycle)] = len(cycle.trail)
+
+            col, row = self.cell(cycle.x, cycle.y)
+            if 0 <= col < self.cols and 0 <= row < self.rows:
+                self.board[row * self.cols + col] = 1
+
+    def update_root(self, player_cycle):
+        """Reuse the subtree of the joint move just played, or start afresh"""
+        heads = (self.cell(self.cycle.x, self.cycle.y), self.cell(player_cycle.x, player_cycle.y))
+        directions = (DIRECTION_INDEX[self.cycle.direction], DIRECTION_INDEX[player_cycle.direction])
+
+        if self.root is not None and self.last_move is not None:
+            child = self.root.children.get((self.last_move, directions[1]))
+            if child is not None and child.heads == list(heads) and not child.terminal:
+                self.root = child
+                self.reused_roots += 1
+                return
+
+        self.root = MCTSNode(list(heads), directions)
+
+    def descend(self, board):
+        """Select down the tree on a board copy, expanding one new node
+
+        Visits are counted on the way down, so paths waiting for a rollout
+        act as a virtual loss and spread parallel leaves across the tree.
+        """
+        node = self.root
+        path = []
+        while not node.terminal:
+            moves = (node.select(0), node.select(1))
+            path.append((node, moves))
+            node.visits += 1
+            node.stats[0][moves[0]][0] += 1
+            node.stats[1][moves[1]][0] += 1
+
+            heads, alive = compact_step(board, self.cols, self.rows, node.heads, moves)
+            child = node.children.get(moves)
+            if child is None:
+                child = MCTSNode(heads, moves, alive)
+                node.children[moves] = child
+                return child, path
+            node = child
+        return node, path
+
+    def backpropagate(self, path, total, count):
+        """Add count rollouts worth total reward (for player 0) along path"""
+        for node, moves in path:
+            # One visit per path was already counted during descent
+            node.visits += count - 1
+            stats0 = node.stats[0][moves[0]]
+            stats1 = node.stats[1][moves[1]]
+            stats0[0] += count - 1
+            stats0[1] += total
+            stats1[0] += count - 1
+            stats1[1] += count - total
+
+    def cancel(self, path):
+        """Undo the virtual visits of a rollout that missed the deadline"""
+        for node, moves in path:
+            node.visits -= 1
+            node.stats[0][moves[0]][0] -= 1
+            node.stats[1][moves[1]][0] -= 1
+
+    def search(self, deadline):
+        pool = get_mcts_pool()
+        # In-process search plays one rollout at a time so it can stop on time
+        batch = MCTS_WORKERS if pool else 1
+        rollouts = MCTS_ROLLOUTS_PER_TASK if pool else 1
+
+        while time.perf_counter() < deadline:
+            pending = []
+            for _ in range(batch):
+                board = bytearray(self.board)
+                leaf, path = self.descend(board)
+                if leaf.terminal:
+                    self.backpropagate(path, leaf.reward * rollouts, rollouts)
+                    continue
+
+                self.seed += 1
+                args = (bytes(board), self.cols, self.rows, leaf.heads, leaf.directions,
+                        rollouts, self.seed)
+                if pool:
+                    pending.append((pool.apply_async(mcts_rollouts, args), path))
+                else:
+                    self.backpropagate(path, mcts_rollouts(*args), rollouts)
+
+            for result, path in pending:
+                try:
+                    total = result.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except multiprocessing.TimeoutError:
+                    self.cancel(path)
+                    continue
+                self.backpropagate(path, total, rollouts)
+
+            self.iterations += batch
+
+    def get_next_direction(self, player_cycle):
+        deadline = time.perf_counter() + self.budget
+        self.sync_board(player_cycle)
+        self.update_root(player_cycle)
+        self.search(deadline)
+
+        # Most visited move; ties (e.g. no visits yet) prefer a move that survives
+        def preference(move):
+            visits, total = self.root.stats[0][move]
+            dc, dr = DIRECTION_STEPS[move]
+            col, row = self.root.heads[0]
+            col += dc
+            row += dr
+            safe = 0 <= col < self.cols and 0 <= row < self.rows and not self.board[row * self.cols + col]
+            return (safe, visits, total)
+
+        self.last_move = max(self.root.actions[0], key=preference)
+        return DIRECTION_ORDER[self.last_move]
+
+def opening_key(key, cycle1, cycle2):
+    """Extend an opening key with the directions both cycles just moved in
+
+    Start from 1 at tick 0. Each tick adds 4 bits, so the key encodes the
+    whole joint move history exactly, which from the fixed start positions
+    identifies the board state.
+    """
+    return key * 16 + DIRECTION_INDEX[cycle1.direction] * 4 + DIRECTION_INDEX[cycle2.direction]
+
+class OpeningBook:
+    """Precomputed AI replies for the first ticks from the fixed start positions
+
+    Built offline by build_opening_book.py. Stored as a small binary file:
+    a header, then per board size a (width, height, depth, count) section
+    followed by count (opening key, direction) entries.
+    """
+    MAGIC = b'MTOB'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHH')  # magic, version, section count
+    SECTION = struct.Struct('<HHBI')  # width, height, depth, entry count
+    ENTRY = struct.Struct('<QB')  # opening key, DIRECTION_ORDER index
+
+    def __init__(self, sections=None):
+        # (width, height) -> (depth, {opening key: move})
+        self.sections = sections or {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.hits = 0
+
+    @classmethod
+    def load(cls, path):
+        """Read a book file, or return None if there isn't a usable one"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as book_file:
+                data = book_file.read()
+            magic, version, section_count = cls.HEADER.unpack_from(data, 0)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                print(f"  ✗ Ignoring opening book with unknown format: {path}")
+                return None
+
+            offset = cls.HEADER.size
+            sections = {}
+            for _ in range(section_count):
+                width, height, depth, count = cls.SECTION.unpack_from(data, offset)
+                offset += cls.SECTION.size
+                entries = {}
+                for key, move in cls.ENTRY.iter_unpack(data[offset:offset + count * cls.ENTRY.size]):
+                    entries[key] = move
+                offset += count * cls.ENTRY.size
+                sections[(width, height)] = (depth, entries)
+        except (OSError, struct.error) as e:
+            print(f"  ✗ Error loading opening book: {e}")
+            return None
+
+        print(f"✓ Opening book loaded ({len(sections)} board sizes)")
+        return cls(sections)
+
+    def save(self, path):
+        parts = [self.HEADER.pack(self.MAGIC, self.VERSION, len(self.sections))]
+        for (width, height), (depth, entries) in sorted(self.sections.items()):
+            parts.append(self.SECTION.pack(width, height, depth, len(entries)))
+            parts.extend(self.ENTRY.pack(key, move) for key, move in sorted(entries.items()))
+        with open(path, 'wb') as book_file:
+            book_file.write(b''.join(parts))
+
+    def depth(self, width, height):
+        section = self.sections.get((width, height))
+        return section[0] if section else 0
+
+    def lookup(self, width, height, key, tick):
+        """Book direction for this opening, or None once out of book"""
+        section = self.sections.get((width, height))
+        if section is None or tick >= section[0]:
+            return None
+
+        self.lookups += 1
+        move = section[1].get(key)
+        if move is None:
+            return None
+        self.hits += 1
+        return DIRECTION_ORDER[move]
+
+    def report(self):
+        if not self.lookups:
+            return "Opening book: not used"
+        return (f"Opening book: {self.hits}/{self.lookups} hits "
+                f"({100.0 * self.hits / self.lookups:.0f}%)")
+
+def run_headless_match(difficulty, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, on_tick=None,
+                       profiles=None, timing=None, players=None, opening=()):
+    """Play AggressiveAI against itself without a display (for offline tools)
+
+    Uses the same start positions as Game.start_game. on_tick, if given, is
+    called as on_tick(tick, cycle1, cycle2, dir1, dir2) after both AIs have
+    decided and before the cycles move. profiles optionally gives each side
+    its own settings dict (ai_lookahead, aggression and optionally factors)
+    instead of DIFFICULTY_SETTINGS[difficulty]; timing optionally gives each
+    side a TimingStats for its decision times. players optionally replaces
+    a side's AI: each entry is None (AggressiveAI) or a callable that takes
+    the side's cycle and returns anything with get_next_direction(opponent),
+    such as an external bot. opening optionally forces the first moves as
+    a sequence of (dir1, dir2) pairs before the AIs take over, so matches
+    between the same players need not all start alike. Returns
+    (winner, ticks).
+
+    Sets the board size globals, so call it from tool processes only, never
+    while a Game is running.
+    """
+    global BOARD_WIDTH, BOARD_HEIGHT
+    BOARD_WIDTH = width
+    BOARD_HEIGHT = height
+
+    if profiles is None:
+        profiles = (DIFFICULTY_SETTINGS[difficulty], DIFFICULTY_SETTINGS[difficulty])
+    (x1, y1), (x2, y2) = start_positions(width, height)
+    board = TrailBoard(width, height)
+    cycle1 = LightCycle(x1, y1, CYAN, Direction.RIGHT, verbose=False, board=board)
+    cycle2 = LightCycle(x2, y2, ORANGE, Direction.LEFT, verbose=False, board=board)
+    if players is None:
+        players = (None, None)
+    ai1, ai2 = [
+        make_player(cycle) if make_player else
+        AggressiveAI(cycle, lookahead_depth=settings['ai_lookahead'], aggression=settings['aggression'],
+                     factors=settings.get('factors'))
+        for cycle, settings, make_player in ((cycle1, profiles[0], players[0]), (cycle2, profiles[1], players[1]))
+    ]
+
+    ticks = 0
+    while cycle1.alive and cycle2.alive:
+        if ticks < len(opening):
+            dir1, dir2 = opening[ticks]
+        else:
+            decision_start = time.perf_counter()
+            dir1 = ai1.get_next_direction(cycle2)
+            decided = time.perf_counter()
+            dir2 = ai2.get_next_direction(cycle1)
+            if timing:
+                timing[0].record(decided - decision_start)
+                timing[1].record(time.perf_counter() - decided)
+        if on_tick:
+            on_tick(ticks, cycle1, cycle2, dir1, dir2)
+
+        cycle1.change_direction(dir1)
+        cycle2.change_direction(dir2)
+        cycle1.move()
+        cycle2.move()
+        cycle1.check_collision(cycle2)
+        cycle2.check_collision(cycle1)
+        ticks += 1
+
+    if not cycle1.alive and not cycle2.alive:
+        winner = 'tie'
+    elif not cycle1.alive:
+        winner = 'player2'
+    else:
+        winner = 'player1'
+    return winner, ticks
+
+class TimingStats:
+    """Running count/average/max of durations without storing every sample"""
+    def __init__(self, name, noun):
+        self.name = name
+        self.noun = noun
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def record(self, duration):
+        self.count += 1
+        self.total += duration
+        self.worst = max(self.worst, duration)
+
+    def as_record(self):
+        """Compact millisecond summary for the match log"""
+        average_ms = self.total / self.count * 1000 if self.count else 0.0
+        return {'n': self.count, 'avg_ms': round(average_ms, 3),
+                'max_ms': round(self.worst * 1000, 3)}
+
+    def report(self):
+        if not self.count:
+            return f"{self.name}: no {self.noun} recorded"
+        average_ms = self.total / self.count * 1000
+        return (f"{self.name}: {self.count} {self.noun}, "
+                f"avg {average_ms:.1f} ms, max {self.worst * 1000:.1f} ms")
+
+class MatchLogger:
+    """Appends finished matches to a JSON-lines file from a background thread
+
+    log() only puts the record on a queue, so disk writes never stall the
+    game loop. The writer drains whatever is queued and writes it in one go.
+    """
+    def __init__(self, path, batch_size=64):
+        self.path = path
+        self.batch_size = batch_size
+        self.records = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    def log(self, record):
+        self.records.put(record)
+
+    def close(self):
+        """Flush anything still queued and stop the writer thread"""
+        self.records.put(None)
+        self.thread.join(timeout=2.0)
+
+    def _writer(self):
+        running = True
+        while running:
+            batch = [self.records.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                running = False
+                batch = [record for record in batch if record is not None]
+            if not batch:
+                continue
+
+            lines = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch)
+            try:
+                with open(self.path, 'a', encoding='utf-8') as log_file:
+                    log_file.write(lines)
+            except OSError as e:
+                print(f"  ✗ Could not write match log: {e}")
+
+class MatchSnapshot:
+    """Restorable match state, taken in O(1) by sharing the cycles' trails
+
+    Restoring truncates trails and frees their board cells, so it costs
+    O(cells added since the snapshot). Timed trails lose cells too, so they
+    are copied instead (at most TRAIL_LIFETIME cells each). Snapshots taken
+    after the one being restored describe an abandoned future and can no
+    longer be restored.
+    """
+    __slots__ = ('match', 'serial', 'tick', 'opening_key', 'rng_state', 'cycles')
+
+    def __init__(self, match, serial, tick, opening_key, rng_state, cycles):
+        self.match = match
+        self.serial = serial
+        self.tick = tick
+        self.opening_key = opening_key
+        self.rng_state = rng_state
+        self.cycles = cycles
+
+    def size_bytes(self):
+        """Approximate memory held by this snapshot (mostly the RNG state)"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.rng_state) + sys.getsizeof(self.cycles)
+        for part in self.rng_state:
+            size += sys.getsizeof(part)
+            if isinstance(part, tuple):
+                size += sum(sys.getsizeof(word) for word in part)
+        size += sum(sys.getsizeof(state) for state in self.cycles)
+        size += sum(sys.getsizeof(state[-1]) for state in self.cycles if isinstance(state[-1], tuple))
+        return size
+
 class Game:
     def __init__(self):
         global WINDOW_WIDTH, WINDOW_HEIGHT
 
+        # Only the game itself starts SDL, so the offline tools that import
+        # this module keep Python's own signal handling
+        pygame.init()
+
         # Set up fullscreen or windowed mode
         if FULLSCREEN:
             # Use (0, 0) to automatically use desktop resolution in fullscreen
@@ -598,8 +1602,33 @@ class Game:
         self.player1 = None
         self.player2 = None
         self.ai = None
+        self.board = None
+        self.arena = False
+        self.timed = False  # Trail cells expire after TRAIL_LIFETIME ticks
+        self.camera = (0, 0)  # Top-left of the view in board pixels
+        self.trail_chunks = None  # TrailChunkCache in arena mode
+
+        self.match_id = 0
+        self.snapshot_serial = 0
+        self.abandoned_snapshots = []  # (restored serial, newest serial) ranges
+        self.rewind_points = deque(maxlen=REWIND_SECONDS + 1)  # One snapshot per second
+        self.snapshot_timing = TimingStats("Snapshot", "snapshots")
+        self.restore_timing = TimingStats("Restore", "restores")
+        self.rewinds = 0
 
         self.winner = None
+        # Press times are only known to lie between two polls, so track both bounds
+        self.input_latency = TimingStats("Input latency (poll to move, lower bound)", "turns")
+        self.input_latency_upper = TimingStats("Input latency (previous poll to move, upper bound)", "turns")
+        self.last_poll = None
+        self.ai_timing = TimingStats("AI decision time", "decisions")
+        self.tick_count = 0
+        self.match_logger = MatchLogger(MATCH_LOG_PATH) if MATCH_LOG_ENABLED else None
+        self.opening_book = OpeningBook.load(OPENING_BOOK_PATH)
+        self.opening_key = 1
+
+        self.needs_redraw = True  # Idle screens only redraw when this is set
+        self.cpu_by_state = {}  # state -> [CPU seconds, wall seconds]
 
     def render_futuristic_text(self, text, font, color, outline_color=None):
         """Render text with futuristic glow and outline effects"""
@@ -650,6 +1679,8 @@ class Game:
             WINDOW_HEIGHT = DEFAULT_HEIGHT
             self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 
+        self.needs_redraw = True
+
     def show_difficulty_menu(self):
         self.screen.fill(DARK_BLUE)
 
@@ -736,59 +1767,200 @@ class Game:
 
         # Menu options with tech styling
         option1 = self.render_futuristic_text("[ 1 ]  VS COMPUTER", self.font_medium, YELLOW)
-        option1_rect = option1.get_rect(center=(WINDOW_WIDTH // 2, 380))
+        option1_rect = option1.get_rect(center=(WINDOW_WIDTH // 2, 360))
         self.screen.blit(option1, option1_rect)
 
         option2 = self.render_futuristic_text("[ 2 ]  TWO PLAYERS", self.font_medium, PURPLE)
-        option2_rect = option2.get_rect(center=(WINDOW_WIDTH // 2, 480))
+        option2_rect = option2.get_rect(center=(WINDOW_WIDTH // 2, 440))
         self.screen.blit(option2, option2_rect)
 
+        option3 = self.render_futuristic_text("[ 3 ]  ARENA VS COMPUTER", self.font_medium, NEON_PINK)
+        option3_rect = option3.get_rect(center=(WINDOW_WIDTH // 2, 520))
+        self.screen.blit(option3, option3_rect)
+
+        option4 = self.render_futuristic_text("[ 4 ]  FADING TRAILS VS COMPUTER", self.font_medium, NEON_BLUE)
+        option4_rect = option4.get_rect(center=(WINDOW_WIDTH // 2, 600))
+        self.screen.blit(option4, option4_rect)
+
         # Decorative separator
-        pygame.draw.line(self.screen, (100, 100, 150), (WINDOW_WIDTH // 2 - 300, 560), (WINDOW_WIDTH // 2 + 300, 560), 2)
+        pygame.draw.line(self.screen, (100, 100, 150), (WINDOW_WIDTH // 2 - 300, 665), (WINDOW_WIDTH // 2 + 300, 665), 2)
 
         # Instructions with icons
         inst1 = self.render_futuristic_text("P1: ↑ ↓ ← →", self.font_small, CYAN)
-        inst1_rect = inst1.get_rect(center=(WINDOW_WIDTH // 2, 620))
+        inst1_rect = inst1.get_rect(center=(WINDOW_WIDTH // 2, 715))
         self.screen.blit(inst1, inst1_rect)
 
         inst2 = self.render_futuristic_text("P2: W A S D", self.font_small, ORANGE)
-        inst2_rect = inst2.get_rect(center=(WINDOW_WIDTH // 2, 680))
+        inst2_rect = inst2.get_rect(center=(WINDOW_WIDTH // 2, 770))
         self.screen.blit(inst2, inst2_rect)
 
         # Back option
         back = self.render_futuristic_text("[ ESC ]  BACK", self.font_tiny, WHITE)
-        back_rect = back.get_rect(center=(WINDOW_WIDTH // 2, 800))
+        back_rect = back.get_rect(center=(WINDOW_WIDTH // 2, 840))
         self.screen.blit(back, back_rect)
 
         pygame.display.flip()
 
-    def start_game(self, mode):
+    def start_game(self, mode, arena=False, timed=False):
+        global BOARD_WIDTH, BOARD_HEIGHT
+
         self.game_mode = mode
+        self.arena = arena
+        self.timed = timed
         self.state = 'playing'
 
-        # Get difficulty settings
-        settings = DIFFICULTY_SETTINGS[self.difficulty]
+        # The board size is fixed for the whole match
+        if arena:
+            BOARD_WIDTH = WINDOW_WIDTH * ARENA_SCALE
+            BOARD_HEIGHT = WINDOW_HEIGHT * ARENA_SCALE
+        else:
+            BOARD_WIDTH = WINDOW_WIDTH
+            BOARD_HEIGHT = WINDOW_HEIGHT
+
+        (x1, y1), (x2, y2) = start_positions(BOARD_WIDTH, BOARD_HEIGHT)
+        self.board = TrailBoard(BOARD_WIDTH, BOARD_HEIGHT, timed=timed)
+        lifetime = TRAIL_LIFETIME if timed else None
 
         # Create player 1 (cyan cycle on left)
-        self.player1 = LightCycle(100, WINDOW_HEIGHT // 2, CYAN, Direction.RIGHT, sprite=BIKE_SPRITE_CYAN)
+        self.player1 = LightCycle(x1, y1, CYAN, Direction.RIGHT, sprite=BIKE_SPRITE_CYAN, board=self.board,
+                                  trail_lifetime=lifetime)
 
         if mode == 'single':
             # Create AI opponent (orange cycle on right)
-            self.player2 = LightCycle(WINDOW_WIDTH - 100, WINDOW_HEIGHT // 2, ORANGE, Direction.LEFT, sprite=BIKE_SPRITE_ORANGE)
-            self.ai = AggressiveAI(
-                self.player2,
-                lookahead_depth=settings['ai_lookahead'],
-                aggression=settings['aggression']
-            )
+            self.player2 = LightCycle(x2, y2, ORANGE, Direction.LEFT, sprite=BIKE_SPRITE_ORANGE, board=self.board,
+                                      trail_lifetime=lifetime)
+            self.ai = self.create_ai()
         else:
             # Create player 2 (orange cycle on right)
-            self.player2 = LightCycle(WINDOW_WIDTH - 100, WINDOW_HEIGHT // 2, ORANGE, Direction.LEFT, sprite=BIKE_SPRITE_ORANGE)
+            self.player2 = LightCycle(x2, y2, ORANGE, Direction.LEFT, sprite=BIKE_SPRITE_ORANGE, board=self.board,
+                                      trail_lifetime=lifetime)
             self.ai = None
 
+        if arena:
+            self.trail_chunks = TrailChunkCache(BOARD_WIDTH, BOARD_HEIGHT)
+        else:
+            self.trail_chunks = None
+        self.update_camera()
+
+        self.match_id += 1
+        self.abandoned_snapshots = []
+        self.rewind_points.clear()
+        self.snapshot_timing.reset()
+        self.restore_timing.reset()
+        self.rewinds = 0
+
         self.winner = None
+        self.input_latency.reset()
+        self.input_latency_upper.reset()
+        self.last_poll = time.perf_counter()
+        self.ai_timing.reset()
+        self.tick_count = 0
+        self.opening_key = 1
+        if self.opening_book:
+            self.opening_book.reset_stats()
+
+    def create_ai(self):
+        """Computer opponent for player 2 at the current difficulty"""
+        settings = DIFFICULTY_SETTINGS[self.difficulty]
+        if AI_TYPE == 'mcts':
+            return MCTSAI(self.player2, fps=settings['fps'])
+        return AggressiveAI(
+            self.player2,
+            lookahead_depth=settings['ai_lookahead'],
+            aggression=settings['aggression'],
+            factors=settings.get('factors')
+        )
+
+    def take_snapshot(self):
+        """Capture the match (cycles, board, RNG, tick) without copying permanent trails"""
+        start = time.perf_counter()
+        self.snapshot_serial += 1
+        snapshot = MatchSnapshot(
+            self.match_id, self.snapshot_serial, self.tick_count, self.opening_key,
+            random.getstate(), (self.player1.snapshot(), self.player2.snapshot())
+        )
+        self.snapshot_timing.record(time.perf_counter() - start)
+        return snapshot
+
+    def rewind_buffer_report(self):
+        size = sum(snapshot.size_bytes() for snapshot in self.rewind_points)
+        return f"Rewind buffer: {len(self.rewind_points)} snapshots, {size / 1024:.1f} KiB"
+
+    def can_restore(self, snapshot):
+        if snapshot.match != self.match_id:
+            return False
+        # Snapshots taken between a restored one and the restore are gone
+        return not any(restored < snapshot.serial <= newest
+                       for restored, newest in self.abandoned_snapshots)
+
+    def restore_snapshot(self, snapshot):
+        """Put the match back exactly as it was when snapshot was taken"""
+        if not self.can_restore(snapshot):
+            raise ValueError("snapshot belongs to another match or an abandoned future")
+
+        start = time.perf_counter()
+        self.player1.restore(snapshot.cycles[0])
+        self.player2.restore(snapshot.cycles[1])
+        self.player1.mark_trail()
+        self.player2.mark_trail()
+
+        # Search trees and synced boards describe the abandoned future. The
+        # AI is rebuilt before the RNG is restored since building it draws
+        # random numbers
+        if self.ai:
+            self.ai = self.create_ai()
+        random.setstate(snapshot.rng_state)
+        self.tick_count = snapshot.tick
+        self.opening_key = snapshot.opening_key
+        self.abandoned_snapshots.append((snapshot.serial, self.snapshot_serial))
+        if self.trail_chunks:
+            self.trail_chunks = TrailChunkCache(BOARD_WIDTH, BOARD_HEIGHT)
+            self.trail_chunks.sync((self.player1, self.player2))
+        self.update_camera()
 
-    def handle_input(self):
-        for event in pygame.event.get():
+        self.state = 'playing'
+        self.winner = None
+        self.restore_timing.record(time.perf_counter() - start)
+
+    def rewind(self):
+        """Go back about REWIND_SECONDS before the crash and play on from there"""
+        if not self.rewind_points:
+            return
+
+        snapshot = self.rewind_points[0]
+        self.rewind_points.clear()
+        self.restore_snapshot(snapshot)
+        self.rewind_points.append(snapshot)
+        self.rewinds += 1
+        self.last_poll = time.perf_counter()
+        print(self.restore_timing.report())
+
+    def update_camera(self):
+        """Centre the view on player 1 without scrolling past the board edges"""
+        cam_x = self.player1.x + GRID_SIZE // 2 - WINDOW_WIDTH // 2
+        cam_y = self.player1.y + GRID_SIZE // 2 - WINDOW_HEIGHT // 2
+        cam_x = max(0, min(cam_x, BOARD_WIDTH - WINDOW_WIDTH))
+        cam_y = max(0, min(cam_y, BOARD_HEIGHT - WINDOW_HEIGHT))
+        self.camera = (cam_x, cam_y)
+
+    def wait_for_events(self):
+        """Block until input arrives (or IDLE_WAIT_MS passes) instead of polling"""
+        event = pygame.event.wait(IDLE_WAIT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def handle_input(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+
+        # A key press lands somewhere between the previous poll and this one,
+        # so those two times bound its latency from below and above
+        polled_at = time.perf_counter()
+        pressed_after = self.last_poll if self.last_poll is not None else polled_at
+        self.last_poll = polled_at
+
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
 
@@ -820,36 +1992,49 @@ class Game:
                         self.start_game('single')
                     elif event.key == pygame.K_2:
                         self.start_game('two_player')
+                    elif event.key == pygame.K_3:
+                        self.start_game('single', arena=True)
+                    elif event.key == pygame.K_4:
+                        self.start_game('single', timed=True)
                     elif event.key == pygame.K_ESCAPE:
                         self.state = 'difficulty_menu'
 
                 elif self.state == 'playing':
+                    # Turns are buffered and applied one per tick in update()
+                    now = (pressed_after, polled_at)
+
                     # Player 1 controls (Arrow keys)
                     if event.key == pygame.K_UP:
-                        self.player1.change_direction(Direction.UP)
+                        self.player1.queue_direction(Direction.UP, now)
                     elif event.key == pygame.K_DOWN:
-                        self.player1.change_direction(Direction.DOWN)
+                        self.player1.queue_direction(Direction.DOWN, now)
                     elif event.key == pygame.K_LEFT:
-                        self.player1.change_direction(Direction.LEFT)
+                        self.player1.queue_direction(Direction.LEFT, now)
                     elif event.key == pygame.K_RIGHT:
-                        self.player1.change_direction(Direction.RIGHT)
+                        self.player1.queue_direction(Direction.RIGHT, now)
 
                     # Player 2 controls (WASD) - only in two player mode
                     if self.game_mode == 'two_player':
                         if event.key == pygame.K_w:
-                            self.player2.change_direction(Direction.UP)
+                            self.player2.queue_direction(Direction.UP, now)
                         elif event.key == pygame.K_s:
-                            self.player2.change_direction(Direction.DOWN)
+                            self.player2.queue_direction(Direction.DOWN, now)
                         elif event.key == pygame.K_a:
-                            self.player2.change_direction(Direction.LEFT)
+                            self.player2.queue_direction(Direction.LEFT, now)
                         elif event.key == pygame.K_d:
-                            self.player2.change_direction(Direction.RIGHT)
+                            self.player2.queue_direction(Direction.RIGHT, now)
 
                 elif self.state == 'game_over':
+                    # The match is logged once it is left, so rewinds
+                    # reopening it do not log it again
                     if event.key == pygame.K_SPACE:
+                        self.log_match()
                         self.state = 'difficulty_menu'
                     elif event.key == pygame.K_r:
-                        self.start_game(self.game_mode)
+                        self.log_match()
+                        self.start_game(self.game_mode, self.arena, self.timed)
+                    elif event.key == pygame.K_b:
+                        self.rewind()
 
         return True
 
@@ -857,15 +2042,42 @@ class Game:
         if self.state != 'playing':
             return
 
-        # AI decision
+        # AI decision (from the opening book while the match is still in book)
         if self.ai and self.player2.alive:
-            new_dir = self.ai.get_next_direction(self.player1)
+            decision_start = time.perf_counter()
+            new_dir = None
+            # Book lines were searched with permanent trails: only valid until the first cell expires
+            if self.opening_book and (not self.timed or self.tick_count < TRAIL_LIFETIME):
+                new_dir = self.opening_book.lookup(BOARD_WIDTH, BOARD_HEIGHT, self.opening_key, self.tick_count)
+            if new_dir is None:
+                new_dir = self.ai.get_next_direction(self.player1)
+            self.ai_timing.record(time.perf_counter() - decision_start)
             self.player2.change_direction(new_dir)
 
+        # Apply one buffered human turn per player this tick
+        queued_at = [self.player1.apply_queued_turn()]
+        if self.game_mode == 'two_player':
+            queued_at.append(self.player2.apply_queued_turn())
+
         # Move cycles
         self.player1.move()
         self.player2.move()
 
+        moved_at = time.perf_counter()
+        for timestamp in queued_at:
+            if timestamp is not None:
+                pressed_after, polled_at = timestamp
+                self.input_latency.record(moved_at - polled_at)
+                self.input_latency_upper.record(moved_at - pressed_after)
+
+        if self.trail_chunks:
+            self.trail_chunks.sync((self.player1, self.player2))
+        self.update_camera()
+
+        self.tick_count += 1
+        if self.opening_book and self.tick_count <= self.opening_book.depth(BOARD_WIDTH, BOARD_HEIGHT):
+            self.opening_key = opening_key(self.opening_key, self.player1, self.player2)
+
         # Check collisions
         p1_collision = self.player1.check_collision(self.player2)
         p2_collision = self.player2.check_collision(self.player1)
@@ -879,6 +2091,65 @@ class Game:
                 self.winner = 'player2'
             else:
                 self.winner = 'player1'
+            print(self.input_latency.report())
+            print(self.input_latency_upper.report())
+            print(self.snapshot_timing.report())
+            print(self.rewind_buffer_report())
+            if self.ai and self.opening_book:
+                print(self.opening_book.report())
+
+        # Keep one rewind point per second of play
+        elif self.tick_count % DIFFICULTY_SETTINGS[self.difficulty]['fps'] == 0:
+            self.rewind_points.append(self.take_snapshot())
+
+    def logged_mode(self):
+        """Mode name for the match log: arena and fading-trail games are kept apart"""
+        if self.arena:
+            return 'arena'
+        if self.timed:
+            return 'timed'
+        return self.game_mode
+
+    def log_match(self):
+        """Queue a compact record of the finished match for the match log"""
+        if not self.match_logger:
+            return
+
+        rows, cols = board_shape(BOARD_WIDTH, BOARD_HEIGHT)
+        self.match_logger.log({
+            'time': round(time.time(), 1),
+            'difficulty': self.difficulty,
+            'mode': self.logged_mode(),
+            'winner': self.winner,
+            'ticks': self.tick_count,
+            'board': [cols, rows],
+            'trails': [len(self.player1.trail), len(self.player2.trail)],
+            'trail_lifetime': TRAIL_LIFETIME if self.timed else None,
+            'ai': self.ai_timing.as_record() if self.ai else None,
+            'book': ([self.opening_book.hits, self.opening_book.lookups]
+                     if self.ai and self.opening_book else None),
+            'rewinds': self.rewinds
+        })
+
+    def draw_board(self):
+        """Draw the grid, trails and cycles as seen from the camera"""
+        if self.trail_chunks:
+            # Arena: only the chunks under the viewport are composited
+            self.trail_chunks.draw(self.screen, self.camera)
+            self.player1.draw_head(self.screen, self.camera)
+            self.player2.draw_head(self.screen, self.camera)
+            return
+
+        # Draw grid lines (white)
+        cam_x, cam_y = self.camera
+        for x in range(-(cam_x % (GRID_SIZE * 5)), WINDOW_WIDTH, GRID_SIZE * 5):
+            pygame.draw.line(self.screen, WHITE, (x, 0), (x, WINDOW_HEIGHT), 1)
+        for y in range(-(cam_y % (GRID_SIZE * 5)), WINDOW_HEIGHT, GRID_SIZE * 5):
+            pygame.draw.line(self.screen, WHITE, (0, y), (WINDOW_WIDTH, y), 1)
+
+        # Draw cycles
+        self.player1.draw(self.screen, self.camera)
+        self.player2.draw(self.screen, self.camera)
 
     def draw(self):
         self.screen.fill(DARK_BLUE)
@@ -888,26 +2159,11 @@ class Game:
         elif self.state == 'mode_menu':
             self.show_mode_menu()
         elif self.state == 'playing':
-            # Draw grid lines (white)
-            for x in range(0, WINDOW_WIDTH, GRID_SIZE * 5):
-                pygame.draw.line(self.screen, WHITE, (x, 0), (x, WINDOW_HEIGHT), 1)
-            for y in range(0, WINDOW_HEIGHT, GRID_SIZE * 5):
-                pygame.draw.line(self.screen, WHITE, (0, y), (WINDOW_WIDTH, y), 1)
-
-            # Draw cycles
-            self.player1.draw(self.screen)
-            self.player2.draw(self.screen)
-
+            self.draw_board()
             pygame.display.flip()
         elif self.state == 'game_over':
-            # Draw final positions with grid lines (white)
-            for x in range(0, WINDOW_WIDTH, GRID_SIZE * 5):
-                pygame.draw.line(self.screen, WHITE, (x, 0), (x, WINDOW_HEIGHT), 1)
-            for y in range(0, WINDOW_HEIGHT, GRID_SIZE * 5):
-                pygame.draw.line(self.screen, WHITE, (0, y), (WINDOW_WIDTH, y), 1)
-
-            self.player1.draw(self.screen)
-            self.player2.draw(self.screen)
+            # Draw final positions
+            self.draw_board()
 
             # Semi-transparent overlay with scanline effect
             overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
@@ -948,23 +2204,56 @@ class Game:
             menu_rect = menu.get_rect(center=(WINDOW_WIDTH // 2, 490))
             self.screen.blit(menu, menu_rect)
 
+            if self.rewind_points:
+                rewind = self.render_futuristic_text(f"[ B ]  REWIND {REWIND_SECONDS} SECONDS", self.font_small, WHITE)
+                rewind_rect = rewind.get_rect(center=(WINDOW_WIDTH // 2, 560))
+                self.screen.blit(rewind, rewind_rect)
+
             pygame.display.flip()
 
+    def report_cpu_usage(self):
+        for state, (cpu, wall) in sorted(self.cpu_by_state.items()):
+            share = 100.0 * cpu / wall if wall else 0.0
+            print(f"CPU time in {state}: {cpu:.2f} s over {wall:.1f} s ({share:.1f}%)")
+
     def run(self):
         running = True
         while running:
-            running = self.handle_input()
-            self.update()
-            self.draw()
-
-            # Use difficulty-based FPS during gameplay, lower FPS for menus
-            if self.state == 'playing' and self.difficulty:
-                fps = DIFFICULTY_SETTINGS[self.difficulty]['fps']
+            state = self.state
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+
+            if self.state == 'playing':
+                # Wait for the tick first so input is polled as late as possible
+                # before the simulation step
+                self.clock.tick(DIFFICULTY_SETTINGS[self.difficulty]['fps'])
+
+                running = self.handle_input()
+                self.update()
+                self.draw()
             else:
-                fps = 30  # Menu FPS
-
-            self.clock.tick(fps)
-
+                # Menus and game over: sleep until something happens, and only
+                # redraw for input, a state change or a resize
+                events = self.wait_for_events()
+                running = self.handle_input(events)
+                if self.state == 'playing':
+                    # Start ticking straight away rather than after a frame wait
+                    self.clock.tick()
+                elif self.needs_redraw or self.state != state or any(
+                        event.type in REDRAW_EVENTS for event in events):
+                    self.draw()
+                    self.needs_redraw = False
+
+            usage = self.cpu_by_state.setdefault(state, [0.0, 0.0])
+            usage[0] += time.process_time() - cpu_start
+            usage[1] += time.perf_counter() - wall_start
+
+        self.report_cpu_usage()
+        if self.state == 'game_over':
+            self.log_match()
+        if self.match_logger:
+            self.match_logger.close()
+        shutdown_mcts_pool()
         pygame.quit()
         sys.exit()
 
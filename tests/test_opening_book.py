@@ -0,0 +1,28 @@
+from max_tron import DIRECTION_ORDER, OpeningBook
+
+
+def test_save_load_round_trip(tmp_path):
+    sections = {
+        (1280, 1024): (3, {1: 3, 0x1F: 2, 0x1F2E: 0, (1 << 63) + 5: 1}),
+        (640, 480): (1, {1: 2}),
+        (320, 240): (0, {}),
+    }
+    path = tmp_path / 'book.bin'
+    OpeningBook(sections).save(path)
+
+    book = OpeningBook.load(path)
+    assert book is not None
+    assert book.sections == sections
+    assert book.depth(1280, 1024) == 3
+    assert book.lookup(1280, 1024, 0x1F, 1) == DIRECTION_ORDER[2]
+    assert book.lookup(1280, 1024, 0x1F, 3) is None  # Out of book
+    assert (book.hits, book.lookups) == (1, 1)
+
+
+def test_load_rejects_missing_and_foreign_files(tmp_path):
+    assert OpeningBook.load(tmp_path / 'missing.bin') is None
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'NOPE' + bytes(8))
+    assert OpeningBook.load(path) is None
+    path.write_bytes(OpeningBook.MAGIC)  # Truncated header
+    assert OpeningBook.load(path) is None
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+import max_tron
+from max_tron import GRID_SIZE, AggressiveAI, Direction, LightCycle, TrailBoard, start_positions
+
+WIDTH = 40 * GRID_SIZE
+HEIGHT = 30 * GRID_SIZE
+
+
+def new_match(trail_lifetime=None):
+    board = TrailBoard(WIDTH, HEIGHT, timed=bool(trail_lifetime))
+    (x1, y1), (x2, y2) = start_positions(WIDTH, HEIGHT)
+    cycles = (LightCycle(x1, y1, max_tron.CYAN, Direction.RIGHT, verbose=False, board=board,
+                         trail_lifetime=trail_lifetime),
+              LightCycle(x2, y2, max_tron.ORANGE, Direction.LEFT, verbose=False, board=board,
+                         trail_lifetime=trail_lifetime))
+    return board, cycles
+
+
+def step(cycles, directions):
+    for cycle, direction in zip(cycles, directions):
+        cycle.change_direction(direction)
+    for cycle in cycles:
+        cycle.move()
+    cycles[0].check_collision(cycles[1])
+    cycles[1].check_collision(cycles[0])
+
+
+def assert_same_board(board, expected):
+    assert board.occupied == expected.occupied
+    assert board.open == expected.open
+    if expected.expires is not None:
+        # Only occupied cells have a meaningful expiry
+        assert [e for e, taken in zip(board.expires, board.occupied) if taken] == \
+               [e for e, taken in zip(expected.expires, expected.occupied) if taken]
+
+
+@pytest.mark.parametrize('trail_lifetime', [None, 12])
+def test_restore_matches_board_rebuilt_from_scratch(monkeypatch, trail_lifetime):
+    rng = random.Random(33)
+    board, cycles = new_match(trail_lifetime)
+    monkeypatch.setattr(max_tron, 'BOARD_WIDTH', WIDTH)
+    monkeypatch.setattr(max_tron, 'BOARD_HEIGHT', HEIGHT)
+    ais = [AggressiveAI(cycle) for cycle in cycles]
+
+    def wander(ai, opponent):
+        """Random safe move with room ahead: wanders more than the AIs, which soon meet head-on"""
+        cycle = ai.cycle
+        safe = [d for d in Direction if ai.is_safe_move(d, opponent)]
+        roomy = [d for d in safe if (board.open_distance(cycle.x, cycle.y, d) or 0) >= 3]
+        return rng.choice(roomy or safe or [cycle.direction])
+
+    played = []
+    snapshots = {}
+    while all(cycle.alive for cycle in cycles) and len(played) < 80:
+        snapshots[len(played)] = [cycle.snapshot() for cycle in cycles]
+        directions = (wander(ais[0], cycles[1]), wander(ais[1], cycles[0]))
+        step(cycles, directions)
+        played.append(directions)
+    assert len(played) > 30
+
+    # Restore the newest snapshot first, as rewinding again would
+    for tick in (len(played) - 1, 25, 3):
+        for cycle, state in zip(cycles, snapshots[tick]):
+            cycle.restore(state)
+        for cycle in cycles:
+            cycle.mark_trail()
+
+        rebuilt_board, rebuilt = new_match(trail_lifetime)
+        for directions in played[:tick]:
+            step(rebuilt, directions)
+
+        assert_same_board(board, rebuilt_board)
+        for cycle, expected in zip(cycles, rebuilt):
+            assert cycle.snapshot() == expected.snapshot()
+            assert list(cycle.trail) == list(expected.trail)
+
+
+@pytest.mark.parametrize('timed', [False, True])
+def test_game_restore_replays_the_same_future(monkeypatch, timed):
+    monkeypatch.setattr(max_tron, 'MATCH_LOG_ENABLED', False)
+    # The game resizes the board and window globals; put them back afterwards
+    for name in ('BOARD_WIDTH', 'BOARD_HEIGHT', 'WINDOW_WIDTH', 'WINDOW_HEIGHT'):
+        monkeypatch.setattr(max_tron, name, getattr(max_tron, name))
+    game = max_tron.Game()
+    game.difficulty = 'easy'
+    game.start_game('single', timed=timed)
+
+    def positions(ticks):
+        seen = []
+        for _ in range(ticks):
+            game.update()
+            seen.append((game.player1.x, game.player1.y, game.player2.x, game.player2.y, game.state))
+        return seen
+
+    positions(10)
+    snapshot = game.take_snapshot()
+    first = positions(30)
+    game.restore_snapshot(snapshot)
+    assert game.tick_count == 10
+    assert positions(30) == first
@@ -0,0 +1,87 @@
+import random
+
+from max_tron import GRID_SIZE, Direction, TrailBoard
+
+
+def ray_walk(board, cell, direction):
+    """Free cells ahead of cell, counted one step at a time"""
+    dx, dy = direction.value
+    row, col = divmod(cell, board.cols)
+    distance = 0
+    while True:
+        col += dx
+        row += dy
+        if not (0 <= col < board.cols and 0 <= row < board.rows):
+            return distance
+        if board.occupied[row * board.cols + col]:
+            return distance
+        distance += 1
+
+
+def assert_matches_ray_walk(board):
+    for direction in Direction:
+        for cell in range(board.rows * board.cols):
+            assert board.open[direction][cell] == ray_walk(board, cell, direction), (direction, cell)
+
+
+def test_random_add_remove_matches_ray_walk():
+    rng = random.Random(30)
+    board = TrailBoard(23 * GRID_SIZE, 17 * GRID_SIZE)
+    cells = [(col * GRID_SIZE, row * GRID_SIZE) for row in range(board.rows) for col in range(board.cols)]
+    for step in range(600):
+        x, y = rng.choice(cells)
+        # Mostly adds early on, mostly removes once the board is busy
+        if rng.random() < 0.6 - 0.3 * (sum(board.occupied) > len(cells) // 2):
+            board.add_obstacle(x, y)
+        else:
+            board.remove_obstacle(x, y)
+        if step % 20 == 0:
+            assert_matches_ray_walk(board)
+    assert_matches_ray_walk(board)
+
+
+def test_open_distance_and_is_free():
+    board = TrailBoard(10 * GRID_SIZE, 5 * GRID_SIZE)
+    board.add_obstacle(6 * GRID_SIZE, 2 * GRID_SIZE)
+    assert board.open_distance(1 * GRID_SIZE, 2 * GRID_SIZE, Direction.RIGHT) == 4
+    assert board.open_distance(1 * GRID_SIZE, 2 * GRID_SIZE, Direction.LEFT) == 1
+    assert board.open_distance(-GRID_SIZE, 0, Direction.UP) is None
+    assert not board.is_free(6 * GRID_SIZE, 2 * GRID_SIZE)
+    assert not board.is_free(10 * GRID_SIZE, 0)
+    board.remove_obstacle(6 * GRID_SIZE, 2 * GRID_SIZE)
+    assert board.open_distance(1 * GRID_SIZE, 2 * GRID_SIZE, Direction.RIGHT) == 8
+
+
+def timed_ray_walk(board, cell, direction, when, limit):
+    """Free cells ahead of cell, treating trail cells gone by the time they are reached as free"""
+    dx, dy = direction.value
+    row, col = divmod(cell, board.cols)
+    distance = 0
+    while limit is None or distance < limit:
+        col += dx
+        row += dy
+        if not (0 <= col < board.cols and 0 <= row < board.rows):
+            break
+        if board.blocked(row * board.cols + col, when + distance + 1):
+            break
+        distance += 1
+    return distance
+
+
+def test_timed_open_distance_matches_ray_walk():
+    rng = random.Random(37)
+    board = TrailBoard(19 * GRID_SIZE, 13 * GRID_SIZE, timed=True)
+    cells = [(col * GRID_SIZE, row * GRID_SIZE) for row in range(board.rows) for col in range(board.cols)]
+    for (x, y) in rng.sample(cells, len(cells) // 3):
+        board.add_obstacle(x, y, rng.randrange(1, 40))
+    for (x, y) in rng.sample(cells, len(cells) // 10):
+        board.remove_obstacle(x, y)
+    assert_matches_ray_walk(board)
+
+    for _ in range(2000):
+        x, y = rng.choice(cells)
+        direction = rng.choice(list(Direction))
+        when = rng.randrange(0, 40)
+        limit = rng.choice([None, rng.randrange(1, 25)])
+        expected = timed_ray_walk(board, board.index(x, y), direction, when, limit)
+        assert board.open_distance(x, y, direction, when, limit) == expected, (x, y, direction, when, limit)
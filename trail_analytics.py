@@ -0,0 +1,301 @@
+"""Post-match analytics over MAX TRON training datasets.
+
+Reads the memory-mapped shards written by tron_dataset.py in chunks and
+computes, per difficulty, with NumPy array operations only:
+  - death heatmaps (the cell each losing cycle crashed into)
+  - territory and board coverage of the final trails, plus a trail heatmap
+  - turn-frequency profiles (straight/left/right) overall and by match phase
+  - how often the AI's chosen move is one that
+    AggressiveAI.is_cutting_off_player would flag, and how often one was
+    available at all
+
+Turn and cut-off figures skip the random opening moves that datasets in
+format 2 flag, since those moves are not the AI's choices.
+
+Shards are processed in parallel and the per-shard totals are added up, so
+memory stays constant however many matches the corpus holds.
+
+Usage:
+    python3 trail_analytics.py DATA_DIR [--out report] [--workers 8]
+
+Needs NumPy (pip3 install -r requirements-tools.txt).
+"""
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+import pygame
+
+from max_tron import CYAN, ORANGE, tool_pool
+from tron_dataset import DIRECTIONS, INDEX_FILE, OUTCOME_CODES, TronDataset
+
+CHUNK_SAMPLES = 1 << 16  # Samples read from a shard at a time
+PHASE_TICKS = 50  # Width of a match phase in the turn profile
+PHASES = 20  # The last phase also holds everything longer
+IMAGE_SCALE = 4  # Pixels per cell in the heatmap images
+TURN_NAMES = ['straight', 'left', 'right', 'reverse']
+
+# (dcol, drow) of each DIRECTIONS code
+STEPS = np.array([direction.value for direction in DIRECTIONS], dtype=np.int64)
+
+
+def turn_table():
+    """TURN_KIND[direction, action] -> index into TURN_NAMES"""
+    table = np.zeros((len(DIRECTIONS), len(DIRECTIONS)), dtype=np.int64)
+    for d, (dx, dy) in enumerate(STEPS):
+        for a, (ax, ay) in enumerate(STEPS):
+            if a == d:
+                continue
+            if ax == -dx and ay == -dy:
+                table[d, a] = 3
+            else:
+                # Screen y points down, so a negative cross product is a left turn
+                table[d, a] = 1 if dx * ay - dy * ax < 0 else 2
+    return table
+
+
+TURN_KIND = turn_table()
+
+
+class CorpusStats:
+    """Additive totals for one slice of the corpus, indexed by difficulty"""
+    def __init__(self, difficulties, rows, cols):
+        count = len(difficulties)
+        self.difficulties = difficulties
+        self.rows = rows
+        self.cols = cols
+        self.matches = np.zeros(count, dtype=np.int64)
+        self.ticks = np.zeros(count, dtype=np.int64)
+        self.deaths = np.zeros((count, 2, rows, cols), dtype=np.int64)
+        self.trails = np.zeros((count, 2, rows, cols), dtype=np.int64)
+        self.territory = np.zeros((count, 2), dtype=np.int64)
+        self.coverage = np.zeros(count, dtype=np.float64)
+        self.turns = np.zeros((count, 2, len(TURN_NAMES)), dtype=np.int64)
+        self.phase_turns = np.zeros((count, PHASES, len(TURN_NAMES)), dtype=np.int64)
+        self.cut_available = np.zeros((count, 2), dtype=np.int64)
+        self.cut_chosen = np.zeros((count, 2), dtype=np.int64)
+
+    def merge(self, other):
+        for name in ('matches', 'ticks', 'deaths', 'trails', 'territory', 'coverage',
+                     'turns', 'phase_turns', 'cut_available', 'cut_chosen'):
+            getattr(self, name).__iadd__(getattr(other, name))
+
+    def add_chunk(self, samples, following_tick):
+        """Add a contiguous run of samples
+
+        following_tick is the tick of the sample after the chunk, or None at
+        the end of a shard. A match ends where the next sample's tick is 0; a
+        shard's last match may have been cut short by its capacity, so it
+        only counts towards the per-tick statistics.
+        """
+        count = len(self.difficulties)
+        difficulty = samples['difficulty'].astype(np.int64)
+        ticks = samples['tick'].astype(np.int64)
+        heads = samples['heads'].astype(np.int64)           # (n, 2, 2) as (col, row)
+        directions = samples['directions'].astype(np.int64)  # (n, 2)
+        actions = samples['actions'].astype(np.int64)        # (n, 2)
+        sides = np.arange(2)
+        # Random opening moves (format 2 and later) are not the AIs' choices
+        if 'opening' in samples.dtype.names:
+            decided = samples['opening'] == 0
+        else:
+            decided = np.ones(len(samples), dtype=bool)
+
+        # Turn frequencies per side and per match phase
+        kinds = TURN_KIND[directions, actions]
+        flat = (difficulty[:, None] * 2 + sides) * len(TURN_NAMES) + kinds
+        self.turns += np.bincount(flat[decided].ravel(), minlength=self.turns.size).reshape(self.turns.shape)
+        phase = np.minimum(ticks // PHASE_TICKS, PHASES - 1)
+        flat = (difficulty[:, None] * PHASES + phase[:, None]) * len(TURN_NAMES) + kinds
+        self.phase_turns += np.bincount(flat[decided].ravel(), minlength=self.phase_turns.size).reshape(
+            self.phase_turns.shape)
+
+        # is_cutting_off_player for all four moves of both sides at once
+        for side in sides:
+            own = heads[:, side]
+            opponent = heads[:, 1 - side]
+            current = np.abs(own - opponent).sum(axis=1)
+            projected = opponent + 3 * STEPS[directions[:, 1 - side]]
+            future = own[:, None, :] + STEPS[None, :, :]
+            cutting = np.abs(future - projected[:, None, :]).sum(axis=2) < current[:, None]
+            cutting &= TURN_KIND[directions[:, side]] != 3
+            available = cutting.any(axis=1) & decided
+            chosen = cutting[np.arange(len(samples)), actions[:, side]] & decided
+            self.cut_available[:, side] += np.bincount(difficulty[available], minlength=count)
+            self.cut_chosen[:, side] += np.bincount(difficulty[chosen], minlength=count)
+
+        # Match ends
+        following = np.append(ticks[1:], -1 if following_tick is None else following_tick)
+        ends = np.flatnonzero(following == 0)
+        if not len(ends):
+            return
+
+        end_difficulty = difficulty[ends]
+        self.matches += np.bincount(end_difficulty, minlength=count)
+        self.ticks += np.bincount(end_difficulty, weights=ticks[ends] + 1, minlength=count).astype(np.int64)
+
+        # The losing cycle moved into the cell it crashed on; a reversing
+        # action is ignored by the game, so that cycle carried straight on
+        outcome = samples['outcome'][ends].astype(np.int64)
+        end_directions = directions[ends]
+        end_actions = actions[ends]
+        moved = np.where(TURN_KIND[end_directions, end_actions] == 3, end_directions, end_actions)
+        crash = heads[ends] + STEPS[moved]
+        cols = np.clip(crash[..., 0], 0, self.cols - 1)
+        rows = np.clip(crash[..., 1], 0, self.rows - 1)
+        died = np.stack([outcome != OUTCOME_CODES['player1'],
+                         outcome != OUTCOME_CODES['player2']], axis=1)
+        flat = ((end_difficulty[:, None] * 2 + sides) * self.rows + rows) * self.cols + cols
+        self.deaths += np.bincount(flat[died], minlength=self.deaths.size).reshape(self.deaths.shape)
+
+        # Final trails (unpacked only for the last sample of each match)
+        planes = np.unpackbits(samples['board'][ends], axis=-1)[..., :self.cols]
+        cells = planes.sum(axis=(2, 3), dtype=np.int64)
+        covered = planes.any(axis=1).sum(axis=(1, 2)) / (self.rows * self.cols)
+        for code in np.unique(end_difficulty):
+            mask = end_difficulty == code
+            self.territory[code] += cells[mask].sum(axis=0)
+            self.coverage[code] += covered[mask].sum()
+            self.trails[code] += planes[mask].sum(axis=0, dtype=np.int64)
+
+
+def analyse_shard(job):
+    """Worker: totals for one shard"""
+    path, difficulties, rows, cols = job
+    shard = np.load(path, mmap_mode='r')
+    stats = CorpusStats(difficulties, rows, cols)
+    for start in range(0, len(shard), CHUNK_SAMPLES):
+        stop = min(start + CHUNK_SAMPLES, len(shard))
+        following_tick = int(shard[stop]['tick']) if stop < len(shard) else None
+        stats.add_chunk(np.asarray(shard[start:stop]), following_tick)
+    return stats
+
+
+def analyse(data_dir, workers):
+    dataset = TronDataset(data_dir)
+    index = dataset.index
+    difficulties = index['difficulties']
+    jobs = [(os.path.join(data_dir, shard['file']), difficulties, index['rows'], index['cols'])
+            for shard in index['shards']]
+
+    total = CorpusStats(difficulties, index['rows'], index['cols'])
+    with tool_pool(max(1, min(workers, len(jobs)))) as pool:
+        for stats in pool.imap_unordered(analyse_shard, jobs):
+            total.merge(stats)
+    return total
+
+
+def percent(part, whole):
+    return 100.0 * part / whole if whole else 0.0
+
+
+def summary_rows(stats):
+    """One row per difficulty that has finished matches"""
+    rows = []
+    for code, difficulty in enumerate(stats.difficulties):
+        matches = int(stats.matches[code])
+        if not matches:
+            continue
+        decisions = stats.turns[code].sum(axis=1)
+        turned = decisions - stats.turns[code, :, 0]
+        rows.append({
+            'difficulty': difficulty,
+            'matches': matches,
+            'ticks_avg': stats.ticks[code] / matches,
+            'p1_cells_avg': stats.territory[code, 0] / matches,
+            'p2_cells_avg': stats.territory[code, 1] / matches,
+            'coverage_pct': 100.0 * stats.coverage[code] / matches,
+            'p1_turn_pct': percent(turned[0], decisions[0]),
+            'p2_turn_pct': percent(turned[1], decisions[1]),
+            'p1_cut_available_pct': percent(stats.cut_available[code, 0], decisions[0]),
+            'p2_cut_available_pct': percent(stats.cut_available[code, 1], decisions[1]),
+            'p1_cut_taken_pct': percent(stats.cut_chosen[code, 0], stats.cut_available[code, 0]),
+            'p2_cut_taken_pct': percent(stats.cut_chosen[code, 1], stats.cut_available[code, 1]),
+        })
+    return rows
+
+
+def print_summary(rows):
+    if not rows:
+        print("No finished matches in the dataset")
+        return
+
+    header = (f"{'DIFFICULTY':<10} {'MATCHES':>8} {'TICKS':>7} {'P1 CELLS':>9} {'P2 CELLS':>9} "
+              f"{'COVER%':>7} {'TURN% P1/P2':>12} {'CUT AVAIL% P1/P2':>17} {'CUT TAKEN% P1/P2':>17}")
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print(f"{row['difficulty']:<10} {row['matches']:>8} {row['ticks_avg']:>7.1f} "
+              f"{row['p1_cells_avg']:>9.1f} {row['p2_cells_avg']:>9.1f} {row['coverage_pct']:>7.1f} "
+              f"{row['p1_turn_pct']:>6.1f}/{row['p2_turn_pct']:<5.1f} "
+              f"{row['p1_cut_available_pct']:>8.1f}/{row['p2_cut_available_pct']:<8.1f} "
+              f"{row['p1_cut_taken_pct']:>8.1f}/{row['p2_cut_taken_pct']:<8.1f}")
+
+
+def heatmap_surface(counts):
+    """Both players' counts on black: player 1 in cyan, player 2 in orange"""
+    image = np.zeros(counts.shape[1:] + (3,), dtype=np.float64)
+    for plane, color in zip(counts, (CYAN, ORANGE)):
+        # Log scale so a few hot cells don't wash out the rest
+        level = np.log1p(plane)
+        if level.max() > 0:
+            level /= level.max()
+        image += level[..., None] * np.array(color, dtype=np.float64)
+    pixels = np.clip(image, 0, 255).astype(np.uint8)
+    surface = pygame.surfarray.make_surface(pixels.transpose(1, 0, 2))
+    rows, cols = counts.shape[1:]
+    return pygame.transform.scale(surface, (cols * IMAGE_SCALE, rows * IMAGE_SCALE))
+
+
+def write_report(stats, rows, out_dir):
+    """Heatmap PNGs plus CSV tables"""
+    os.makedirs(out_dir, exist_ok=True)
+    for code, difficulty in enumerate(stats.difficulties):
+        if not stats.matches[code]:
+            continue
+        pygame.image.save(heatmap_surface(stats.deaths[code]),
+                          os.path.join(out_dir, f'deaths_{difficulty}.png'))
+        pygame.image.save(heatmap_surface(stats.trails[code]),
+                          os.path.join(out_dir, f'trails_{difficulty}.png'))
+
+    with open(os.path.join(out_dir, 'summary.csv'), 'w', newline='', encoding='utf-8') as summary_file:
+        writer = csv.DictWriter(summary_file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: round(value, 3) if isinstance(value, float) else value
+                             for key, value in row.items()})
+
+    with open(os.path.join(out_dir, 'turn_profile.csv'), 'w', newline='', encoding='utf-8') as profile_file:
+        writer = csv.writer(profile_file)
+        writer.writerow(['difficulty', 'from_tick'] + [f'{name}_pct' for name in TURN_NAMES])
+        for code, difficulty in enumerate(stats.difficulties):
+            for phase, counts in enumerate(stats.phase_turns[code]):
+                if counts.sum():
+                    writer.writerow([difficulty, phase * PHASE_TICKS] +
+                                    [round(percent(value, counts.sum()), 2) for value in counts])
+    print(f"Wrote heatmaps and tables to {out_dir}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse a MAX TRON training dataset")
+    parser.add_argument('data_dir', help="directory written by tron_dataset.py export")
+    parser.add_argument('--out', help="directory for heatmap images and CSV tables")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.data_dir, INDEX_FILE)):
+        print(f"No dataset found in {args.data_dir}")
+        return 1
+
+    stats = analyse(args.data_dir, args.workers)
+    rows = summary_rows(stats)
+    print_summary(rows)
+    if args.out and rows:
+        write_report(stats, rows, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Export and load MAX TRON board-state datasets for training new opponents.
+
+Headless AggressiveAI self-play games are recorded one sample per tick:
+the board (both trails as packed bit planes), both cycle heads and
+directions, the direction each AI chose and the final outcome. Every game
+starts with a few random safe moves so the games don't all begin the same
+way; samples from those ticks are flagged as opening moves. Samples are
+written with a fixed shape into memory-mapped .npy shards, one shard per
+worker process, so workers never share a file and need no lock. A small
+index.json next to the shards describes the layout.
+
+Usage:
+    python3 tron_dataset.py export OUT_DIR --samples 1000000 --workers 8 [--opening-moves 20]
+    python3 tron_dataset.py info OUT_DIR
+
+Needs NumPy (pip3 install -r requirements-tools.txt).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+import max_tron
+from max_tron import DEFAULT_OPENING_MOVES, Direction, DIFFICULTY_SETTINGS, GRID_SIZE, board_shape, random_opening
+
+INDEX_FILE = 'index.json'
+FORMAT_VERSION = 2
+
+DIFFICULTIES = list(DIFFICULTY_SETTINGS)
+DIRECTIONS = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+OUTCOME_CODES = {'tie': 0, 'player1': 1, 'player2': 2}
+
+
+def sample_dtype(width, height):
+    """Fixed-size record for one tick of one match"""
+    rows, cols = board_shape(width, height)
+    packed_row = -(-cols // 8)
+    return np.dtype([
+        ('board', np.uint8, (2, rows, packed_row)),  # Trail bit planes (player1, player2)
+        ('heads', np.int16, (2, 2)),                 # (col, row) of each head
+        ('directions', np.uint8, (2,)),              # Current directions (DIRECTIONS index)
+        ('actions', np.uint8, (2,)),                 # Directions the AIs chose this tick
+        ('opening', np.uint8),                       # 1 if actions are random opening moves
+        ('outcome', np.uint8),                       # OUTCOME_CODES of the finished match
+        ('difficulty', np.uint8),                    # DIFFICULTIES index
+        ('tick', np.uint16),
+    ])
+
+
+def unpack_board(sample, width):
+    """Unpack a sample's board into a (2, rows, cols) array of 0/1"""
+    cols = -(-width // GRID_SIZE)
+    return np.unpackbits(sample['board'], axis=-1)[..., :cols]
+
+
+def export_shard(args):
+    """Worker: fill one shard with samples from headless self-play"""
+    out_dir, shard_id, capacity, width, height, opening_moves, seed = args
+    random.seed(seed)
+
+    dtype = sample_dtype(width, height)
+    rows, cols = board_shape(width, height)
+    path = os.path.join(out_dir, f'shard_{shard_id:04d}.npy')
+    shard = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(capacity,))
+
+    planes = np.zeros((2, rows, cols), dtype=np.uint8)
+    written = 0
+    games = 0
+
+    while written < capacity:
+        difficulty = DIFFICULTIES[(shard_id + games) % len(DIFFICULTIES)]
+        planes[:] = 0
+        game_samples = []
+        opening = random_opening(width, height, opening_moves, random)
+
+        def record_tick(tick, cycle1, cycle2, dir1, dir2):
+            # Only the newest trail cell changes each tick
+            for plane, cycle in enumerate((cycle1, cycle2)):
+                if cycle.trail:
+                    tx, ty = cycle.trail[-1]
+                    planes[plane, ty // GRID_SIZE, tx // GRID_SIZE] = 1
+
+            sample = np.zeros((), dtype=dtype)
+            sample['board'] = np.packbits(planes, axis=-1)
+            sample['heads'] = [[cycle1.x // GRID_SIZE, cycle1.y // GRID_SIZE],
+                               [cycle2.x // GRID_SIZE, cycle2.y // GRID_SIZE]]
+            sample['directions'] = [DIRECTION_CODES[cycle1.direction], DIRECTION_CODES[cycle2.direction]]
+            sample['actions'] = [DIRECTION_CODES[dir1], DIRECTION_CODES[dir2]]
+            sample['opening'] = tick < len(opening)
+            sample['difficulty'] = DIFFICULTIES.index(difficulty)
+            sample['tick'] = min(tick, 0xFFFF)
+            game_samples.append(sample)
+
+        winner, _ = max_tron.run_headless_match(difficulty, width, height, on_tick=record_tick,
+                                                opening=opening)
+        games += 1
+
+        # Outcome is only known once the match ends
+        take = min(len(game_samples), capacity - written)
+        for i in range(take):
+            game_samples[i]['outcome'] = OUTCOME_CODES[winner]
+            shard[written + i] = game_samples[i]
+        written += take
+
+    shard.flush()
+    del shard
+    return {'file': os.path.basename(path), 'samples': written, 'games': games}
+
+
+def export(out_dir, samples, workers, width, height, seed, opening_moves=DEFAULT_OPENING_MOVES):
+    os.makedirs(out_dir, exist_ok=True)
+
+    per_shard = -(-samples // workers)
+    jobs = []
+    remaining = samples
+    for shard_id in range(workers):
+        capacity = min(per_shard, remaining)
+        if capacity <= 0:
+            break
+        jobs.append((out_dir, shard_id, capacity, width, height, opening_moves, seed + shard_id))
+        remaining -= capacity
+
+    with max_tron.tool_pool(len(jobs)) as pool:
+        shards = pool.map(export_shard, jobs)
+
+    rows, cols = board_shape(width, height)
+    index = {
+        'version': FORMAT_VERSION,
+        'width': width,
+        'height': height,
+        'grid_size': GRID_SIZE,
+        'opening_moves': opening_moves,
+        'rows': rows,
+        'cols': cols,
+        'directions': [direction.name for direction in DIRECTIONS],
+        'difficulties': DIFFICULTIES,
+        'outcomes': sorted(OUTCOME_CODES, key=OUTCOME_CODES.get),
+        'shards': shards,
+    }
+    with open(os.path.join(out_dir, INDEX_FILE), 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, indent=2)
+
+    print(f"Wrote {sum(shard['samples'] for shard in shards)} samples from "
+          f"{sum(shard['games'] for shard in shards)} games into {len(shards)} shards")
+
+
+class TronDataset:
+    """Random access over all shards without loading them into RAM"""
+    def __init__(self, data_dir):
+        with open(os.path.join(data_dir, INDEX_FILE), 'r', encoding='utf-8') as index_file:
+            self.index = json.load(index_file)
+
+        self.width = self.index['width']
+        self.shards = [np.load(os.path.join(data_dir, shard['file']), mmap_mode='r')
+                       for shard in self.index['shards']]
+        self.offsets = np.cumsum([0] + [len(shard) for shard in self.shards])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        shard_id = int(np.searchsorted(self.offsets, i, side='right')) - 1
+        return self.shards[shard_id][i - self.offsets[shard_id]]
+
+    def board(self, i):
+        return unpack_board(self[i], self.width)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MAX TRON training dataset tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help="record headless AI games")
+    export_parser.add_argument('out_dir')
+    export_parser.add_argument('--samples', type=int, default=100000)
+    export_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    export_parser.add_argument('--width', type=int, default=max_tron.DEFAULT_WIDTH)
+    export_parser.add_argument('--height', type=int, default=max_tron.DEFAULT_HEIGHT)
+    export_parser.add_argument('--seed', type=int, default=0)
+    export_parser.add_argument('--opening-moves', type=int, default=DEFAULT_OPENING_MOVES,
+                               help="random safe moves both cycles make before the AIs take over")
+
+    info_parser = commands.add_parser('info', help="describe an exported dataset")
+    info_parser.add_argument('data_dir')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        export(args.out_dir, args.samples, args.workers, args.width, args.height, args.seed,
+               args.opening_moves)
+    else:
+        dataset = TronDataset(args.data_dir)
+        print(f"{len(dataset)} samples in {len(dataset.shards)} shards "
+              f"({dataset.index['cols']}x{dataset.index['rows']} board, "
+              f"{dataset.shards[0].dtype.itemsize} bytes per sample)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())